@@ -0,0 +1,4 @@
+from .backtest import Backtest, create_optimal
+from .cache import BacktestCache
+
+version='1.0.0'
\ No newline at end of file
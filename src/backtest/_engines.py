@@ -0,0 +1,17 @@
+# Engines used for each site and what gets added to every optimal lineup
+
+import engineDK
+import engineFD
+
+ENGINES = {'draftkings': engineDK.EngineDK, 'fanduel': engineFD.EngineFD}
+
+# Package of each engine, source is hashed so cached results are thrown out whenever roster rules/checkers change
+ENGINE_PACKAGES = {'draftkings': engineDK, 'fanduel': engineFD}
+
+ATTRIBUTES = (
+    'n_teams', 'n_starters', 'n_games',
+    'teams', 'games',
+    'distro', 'game-distro',
+    'salaries', 'minutes',
+    'C-salary'
+)
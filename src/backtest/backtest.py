@@ -0,0 +1,170 @@
+import os
+import time
+import traceback
+import multiprocessing
+import multiprocessing.connection
+
+import pandas as pd
+
+from collections.abc import Iterator
+
+from ._engines import ATTRIBUTES, ENGINES
+from .cache import BacktestCache
+
+
+def create_optimal(site: str, data: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """
+    Creates optimal lineups for a single slate
+    data is optimizer dataframe for the slate (PastPerformances.optimizer_dfs[date])
+    Optional:
+        - top_n: number of lineups kept (default: 10)
+        - any other kwargs passed to engine
+    """
+    top_n = kwargs.pop('top_n', 10)
+    engine = ENGINES[site](data, **kwargs)
+
+    # All attributes computed in one batch from player ids rather than a .map(lambda) per attribute
+    return engine.annotate(engine.create_lineups(top_n=top_n), *ATTRIBUTES)
+
+
+def _work(sender, site: str, data: pd.DataFrame, kwargs: dict) -> None:
+    """
+    Runs in worker process, result (or traceback) sent back through worker's own pipe
+    Own pipe per worker so killing one can never corrupt what another sends back
+    """
+    try:
+        sender.send((create_optimal(site, data, **kwargs), None))
+    except Exception:
+        sender.send((None, traceback.format_exc()))
+    finally:
+        sender.close()
+
+
+class Backtest:
+
+    def __init__(self, site: str, **kwargs) -> None:
+        """
+        Creates optimals for many slates at once, one process per slate
+        Slates are independent so they run in parallel, finished slates are yielded as soon as they are done
+        Optional:
+            - workers: max number of slates running at once (default: number of cores)
+            - timeout: seconds a slate can run before it is killed and skipped (default: None, no limit)
+            - engine_kwargs: passed to create_optimal (Example: {'top_n': 20})
+            - filing: Filing to cache results with, each slate saved as soon as it finishes (default: None, no cache)
+            - refresh: rerun every slate even if cached, results still saved (default: False)
+        Slates that time out or raise are recorded in self.failed as {date: reason} instead of stopping the run
+        With a cache, an interrupted run picks up where it left off and only new or changed slates are created
+        """
+        self.site = site
+        self.workers = max(1, kwargs.get('workers', os.cpu_count() or 1))
+        self.timeout = kwargs.get('timeout', None)
+        self.engine_kwargs = kwargs.get('engine_kwargs', dict())
+        self.refresh = kwargs.get('refresh', False)
+
+        self.cache = BacktestCache(kwargs['filing'], site, engine_kwargs=self.engine_kwargs) if kwargs.get('filing') is not None else None
+
+        self.failed = dict()
+        # Dates loaded from cache in last run
+        self.cached = list()
+
+        return None
+
+    def run(self, slates: dict[str, pd.DataFrame]) -> Iterator[tuple[str, pd.DataFrame]]:
+        """
+        Takes {date: optimizer dataframe} and yields (date, optimals) in order slates finish
+        Example:
+            - for date, df in Backtest('fanduel', workers=8, timeout=600).run(pp.optimizer_dfs): ...
+        """
+        self.cached = list()
+
+        # Cached slates returned right away, only the rest are created
+        if self.cache is not None and not self.refresh:
+            for date, data in slates.items():
+                optimals = self.cache.get(data)
+
+                if optimals is not None:
+                    self.cached.append(date)
+                    yield date, optimals
+
+        pending = [(date, data) for date, data in slates.items() if date not in self.cached][::-1]
+
+        # {date: (process, receiving end of its pipe, start time)}
+        running = dict()
+
+        try:
+            while pending or running:
+
+                # Keep every worker busy
+                while pending and len(running) < self.workers:
+                    date, data = pending.pop()
+                    receiver, sender = multiprocessing.Pipe(duplex=False)
+                    process = multiprocessing.Process(target=_work, args=(sender, self.site, data, self.engine_kwargs), daemon=True)
+                    process.start()
+                    # Only worker holds sending end, so a worker that dies without sending anything shows up as EOF
+                    sender.close()
+                    running[date] = (process, receiver, time.monotonic())
+
+                # Every result already sent is read before anything is timed out
+                ready = multiprocessing.connection.wait([receiver for _, receiver, _ in running.values()], timeout=1.0)
+
+                for date in [date for date, (_, receiver, _) in running.items() if receiver in ready]:
+                    process, receiver, _ = running.pop(date)
+
+                    try:
+                        optimals, error = receiver.recv()
+                    except EOFError:
+                        optimals, error = None, None
+
+                    receiver.close()
+                    process.join()
+
+                    if optimals is None and error is None:
+                        self.failed[date] = f'Worker exited with code {process.exitcode}'
+                    elif error is None:
+                        if self.cache is not None:
+                            self.cache.put(slates[date], optimals)
+
+                        yield date, optimals
+                    else:
+                        self.failed[date] = error
+
+                # Kill slates over time limit, a worker that has started sending its result is left to finish (read next time around)
+                now = time.monotonic()
+                for date, (process, receiver, start) in list(running.items()):
+                    if self.timeout is not None and now - start > self.timeout and not receiver.poll():
+                        process.terminate()
+                        process.join()
+                        receiver.close()
+                        running.pop(date, None)
+                        self.failed[date] = f'Timed out after {self.timeout}s'
+
+        finally:
+            # Generator closed early (Example: KeyboardInterrupt in notebook) -> don't leave workers behind
+            for process, receiver, _ in running.values():
+                process.terminate()
+                process.join()
+                receiver.close()
+
+        return None
+
+    def optimals(self, slates: dict[str, pd.DataFrame], **kwargs) -> dict[str, pd.DataFrame]:
+        """
+        Runs every slate and returns {date: optimals}, sorted by date
+        Optional:
+            - progress: tqdm (or similar) to wrap results with for a progress bar
+        """
+        progress = kwargs.get('progress', lambda iterable, **_: iterable)
+
+        optimals = dict(progress(self.run(slates), total=len(slates)))
+
+        return {date: optimals[date] for date in sorted(optimals)}
+
+    @classmethod
+    def table(cls, optimals: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Consolidates {date: optimals} into single dataframe with date column
+        """
+        return (pd
+                .concat([df.assign(date=date) for date, df in optimals.items()], ignore_index=True)
+                .astype({'date': 'category'})
+               )
@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+import lineups
+
+from lineups import FeasibleCache
+
+from ._engines import ATTRIBUTES, ENGINE_PACKAGES
+
+
+class BacktestCache:
+
+    def __init__(self, filing, site: str, **kwargs) -> None:
+        """
+        Saves optimals for every slate as soon as they are created so they never have to be created again
+        Past boxscores and contest files never change, so a slate only needs to be rerun if its inputs do
+        Key for a slate is a hash of:
+            - optimizer dataframe (values, index, columns and dtypes)
+            - site and engine kwargs (top_n, sum_cols, etc.)
+            - source of engine package, so changing roster rules or checkers reruns everything
+            - attributes added to optimals, and source of lineups.LineupAnalytics that computes them
+        Optional:
+            - engine_kwargs: same kwargs given to Backtest
+            - attributes: attributes added to optimals (default: ATTRIBUTES)
+        """
+        self.filing = filing
+        self.site = site
+
+        config = {
+            'site': site,
+            'engine_kwargs': kwargs.get('engine_kwargs', dict()),
+            'attributes': list(kwargs.get('attributes', ATTRIBUTES)),
+            'rules': self.rules_hash(site),
+            'analytics': FeasibleCache.source_hash(os.path.dirname(lineups.__file__), files=('analytics.py',)),
+        }
+        self.config = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+        return None
+
+    @classmethod
+    def rules_hash(cls, site: str) -> str:
+        """
+        Hash of every source file in engine package for site, and of lineups modules engines fill lineups with
+        """
+        return FeasibleCache.source_hash(os.path.dirname(ENGINE_PACKAGES[site].__file__)) + FeasibleCache.generation_hash()
+
+    def key(self, data: pd.DataFrame) -> str:
+        """
+        Key for slate with optimizer dataframe data
+        """
+        digest = hashlib.sha256(self.config.encode())
+        digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in data.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+
+        return digest.hexdigest()[:32]
+
+    def __contains__(self, data: pd.DataFrame) -> bool:
+        return self.filing.exists('backtests', site=self.site, key=self.key(data))
+
+    def get(self, data: pd.DataFrame) -> pd.DataFrame|None:
+        """
+        Returns cached optimals for slate, None if slate hasn't been run with same inputs
+        """
+        if data not in self:
+            return None
+
+        return self.filing.load('backtests', site=self.site, key=self.key(data))
+
+    def put(self, data: pd.DataFrame, optimals: pd.DataFrame) -> str:
+        """
+        Saves optimals for slate, returns path
+        """
+        return self.filing.save('backtests', optimals, site=self.site, key=self.key(data))
@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pandas as pd
 
@@ -6,12 +8,13 @@ import itertools
 from functools import cache
 from tqdm.notebook import tqdm
 
-# from .checker import Checker
 # from .generator import Generator
 
 from typing import Any
 from collections.abc import Sequence
 
+from lineups import LineupPool, FeasibleCache, LateSwap, LineupMILP, Dominance, StageOrder, Preflight, Constraints
+
 from .checker import Checker
 
 
@@ -25,10 +28,28 @@ class EngineDK:
         """
         df = data.copy(deep=True)
         self.PAST = kwargs.get('past', True)
+        # Kept so engine can be rebuilt when players are added or removed
+        self.kwargs = kwargs
+
+        self.labels = ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F', 'UTIL']
+        # Positions that can fill each slot
+        self.eligible = {
+            'PG': ('PG',), 'SG': ('SG',), 'SF': ('SF',), 'PF': ('PF',), 'C': ('C',),
+            'G': ('PG', 'SG'), 'F': ('SF', 'PF'), 'UTIL': ('PG', 'SG', 'SF', 'PF', 'C'),
+        }
 
         if 'opp' in df.columns:
             # If ValueError, check to see if self.data.empty
             df['game'] = df[['team', 'opp']].apply(lambda row: '-'.join(sorted([row.iloc[0], row.iloc[1]])), axis=1)
+
+        # constraints={include, exclude, groups, stacks, bring_backs, bans, ...} enforced while lineups are filled (see lineups.Constraints)
+        self.constraints = Constraints(df, **kwargs.get('constraints', dict()))
+
+        # prune=top_n drops players that can't be in best top_n lineups before anything is built, what was removed is in self.pruned
+        self.pruned = pd.DataFrame()
+        if 'prune' in kwargs:
+            df = self.prune(df, kwargs['prune'])
+            self.constraints = Constraints(df, **kwargs.get('constraints', dict()))
         
         positions = ['PG', 'SG', 'SF', 'PF', 'C']
         for pos in positions:
@@ -38,8 +59,15 @@ class EngineDK:
         self.pos_players = {pos: tuple(df.loc[df[pos] == 1].index) for pos in positions}
 
         df = df.drop(positions, axis=1)
-        self.labels = ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F', 'UTIL']
+        # Player table, position of player in table is their id in LineupPool
+        self.data = df
+        # Headers for csv uploaded to site
+        self.upload_labels = self.labels
         self.checker = Checker(df, past=self.PAST)
+        # lineups.StageOrder of last fill_slots, with order slots were filled in and estimates it was chosen from
+        self.stages = None
+        # Estimates of every engine from last create_lineups(solver='auto'), see preflight
+        self.preflight_report = pd.DataFrame()
 
         self.sum_cols = sum([
             ['fpts', 'salary'],
@@ -48,6 +76,31 @@ class EngineDK:
 
         return None
 
+    def prune(self, df: pd.DataFrame, top_n: int) -> pd.DataFrame:
+        """
+        Returns players without any that can't be in best top_n lineups (see lineups.Dominance), removed players kept in self.pruned
+        Salary range from checker, checker's rules on partial lineups (check_pg_sg_sf, check4 to check7) also have to hold after a swap:
+            - only teammates count as dominators (n_teams of every partial lineup stays the same, PAST too)
+            - every slot but UTIL is in a partial lineup with a max cost, so only dominators with same salary count there
+        Players in constraints are never dropped and never count as dominators
+        """
+        checker = Checker(df, past=self.PAST)
+
+        dominance = Dominance(df, self.labels, self.eligible, top_n=top_n, salary=(checker.mincost, checker.maxcost),
+                              team_max=(None if self.PAST else min([checker.TEAM_MAX, *checker.TEAM_MAX_PLAYERS.values()])),
+                              same_team=True, fixed_salary=self.labels[:-1],
+                              exclude=self.constraints.names(), keep=self.constraints.names())
+        df = dominance.prune()
+        self.pruned = dominance.removed
+
+        return df
+
+    def unpruned_kwargs(self) -> dict[str, Any]:
+        """
+        kwargs engine was created with, without prune (for rebuilding engine around lineups already created)
+        """
+        return {key: value for key, value in self.kwargs.items() if key != 'prune'}
+
         
 
     def flatten(cls, nestedSeq: Sequence[Sequence[Any,...], ...], **kwargs) -> list[Any,...]:
@@ -92,31 +145,58 @@ class EngineDK:
         """
         return tuple([sum(combo, tuple()) for combo in itertools.product(*args)])
 
-    def create_lineups(self, **kwargs):
+    def rules(self) -> dict[str, Any]:
         """
-        Creates lineups in proper format
+        Everything other than the player table that decides which lineups are valid, part of FeasibleCache key
+        Source of engine package and of lineups modules that fill lineups (see FeasibleCache.GENERATION) is included, so editing either regenerates saved lineups
         """
+        return {
+            'engine': type(self).__name__,
+            'past': self.PAST,
+            'constraints': self.constraints.rules(),
+            'source': FeasibleCache.source_hash(os.path.dirname(__file__)),
+            'generation': FeasibleCache.generation_hash(),
+        }
+
+    def slot_players(self) -> dict[str, tuple[tuple[str], ...]]:
+        """
+        Players eligible for every slot in self.labels, as 1 player combos
+        """
+        return {
+            'PG': self.combos(self.pos_players['PG'], 1),
+            'SG': self.combos(self.pos_players['SG'], 1),
+            'SF': self.combos(self.pos_players['SF'], 1),
+            'PF': self.combos(self.pos_players['PF'], 1),
+            'C': self.combos(self.pos_players['C'], 1),
+            'G': self.combos(sum([
+                self.pos_players['PG'],
+                self.pos_players['SG']
+            ], tuple()), 1),
+            'F': self.combos(sum([
+                self.pos_players['SF'],
+                self.pos_players['PF']
+            ], tuple()), 1),
+            'UTIL': self.combos(sum([
+                self.pos_players[pos_] for pos_ in ('PG', 'SG', 'SF', 'PF', 'C')
+            ], tuple()), 1),
+        }
+
+    def fill_slots(self, slots: dict[str, tuple[tuple[str], ...]], **kwargs) -> tuple[tuple[str,...], ...]:
+        """
+        Takes players for every slot (see slot_players) and returns every valid lineup
+        Same lineups in same order whatever order slots are filled in
+        With constraints lineups are always filled by stage_order (only place they are enforced), 'labels' is then same order as below
+        Optional:
+            - order: 'auto' to pick from pool (see stage_order), 'labels' for slots in order of self.labels, or list of slots (default: 'labels')
+        """
+        order = kwargs.get('order', 'labels')
 
-        pg = self.combos(self.pos_players['PG'], 1)
-        sg = self.combos(self.pos_players['SG'], 1)
-        sf = self.combos(self.pos_players['SF'], 1)
-        pf = self.combos(self.pos_players['PF'], 1)
-        c = self.combos(self.pos_players['C'], 1)
-
-        g = self.combos(sum([
-            self.pos_players['PG'],
-            self.pos_players['SG']
-        ], tuple()), 1)
-
-        f  = self.combos(sum([
-            self.pos_players['SF'],
-            self.pos_players['PF']
-        ], tuple()), 1)
+        if order != 'labels' or self.constraints.counts:
+            self.stages = self.stage_order(slots)
 
-        util = self.combos(sum([
-            self.pos_players[pos_] for pos_ in ('PG', 'SG', 'SF', 'PF', 'C')
-        ], tuple()), 1)
+            return self.stages.fill(self.stages.choose() if order == 'auto' else (self.stages.units if order == 'labels' else order))
 
+        pg, sg, sf, pf, c, g, f, util = [slots[label] for label in self.labels]
 
         pg_sg = tuple([ combo for combo in self.cross_combos(pg, sg) if self.checker.check_guards(combo)])
         pg_sg_sf = tuple([ combo for combo in self.cross_combos(pg, sg, sf) if self.checker.check_pg_sg_sf(combo) ])
@@ -129,42 +209,233 @@ class EngineDK:
         pg_sg_sf_pf_c_g = tuple([ combo for combo in self.cross_combos(pg_sg_sf_pf_c, g) if self.checker.check(combo)])
         pg_sg_sf_pf_c_g_f = tuple([ combo for combo in self.cross_combos(pg_sg_sf_pf_c_g, f) if self.checker.check(combo)])
 
-        lineups = tuple([lineup for lineup in self.cross_combos(pg_sg_sf_pf_c_g_f, util) if self.checker.check(lineup)])
+        return tuple([lineup for lineup in self.cross_combos(pg_sg_sf_pf_c_g_f, util) if self.checker.check(lineup)])
+
+    def stage_order(self, slots: dict[str, tuple[tuple[str], ...]]) -> StageOrder:
+        """
+        Slots of fill_slots as stages of lineups.StageOrder, so they can be filled in any order
+        Every check runs on the same slots as when filled in order of self.labels (PG/SG/SF, then one more slot at a time)
+        Partial lineups are also dropped once they can't end up between checker's min and max cost, or can't follow constraints
+        """
+        checks = sum([
+            [(('PG', 'SG', 'SF'), self.checker.check_pg_sg_sf)],
+            [(tuple(self.labels[:k]), self.checker.check) for k in range(4, len(self.labels) + 1)],
+        ], list())
+
+        return StageOrder(
+            {label: slots[label] for label in self.labels},
+            checks,
+            self.data['salary'].to_dict(),
+            salary=(self.checker.mincost, self.checker.maxcost),
+            counts=self.constraints.counts,
+        )
+
+    def generate(self, **kwargs) -> LineupPool:
+        """
+        Creates all valid lineups as a LineupPool (player ids instead of names), in generation order
+        Lineups with the same players in a different order are dropped
+        Optional:
+            - including: only lineups with at least one of these players, each is fixed at every slot they can fill (G/F/UTIL too) and only the other slots are enumerated
+            - order: order slots are filled in, see fill_slots (default: 'auto', chosen order and estimates in self.stages.order/self.stages.report)
+        """
+        if 'including' not in kwargs:
+            lineups = self.fill_slots(self.slot_players(), order=kwargs.get('order', 'auto'))
+        else:
+            slots = self.slot_players()
+            lineups = list()
+
+            # Every slot, not only base positions: swapping player from G/F/UTIL into their position slot changes which players
+            # partial lineups (PG/SG/SF, first 4 to 7 slots) have, so checker's cost rules can drop one arrangement and keep the other
+            for name in kwargs['including']:
+                for label, players in slots.items():
+                    if (name,) in players:
+                        lineups.extend(self.fill_slots({**slots, label: ((name,),)}, order=kwargs.get('order', 'auto')))
+
+        return (LineupPool
+                .from_names(lineups, self.data, self.labels, sum_cols=self.sum_cols)
+                .dedupe()
+               )
+
+    def feasible(self, **kwargs) -> LineupPool:
+        """
+        All valid lineups scored with self.data, unsorted
+        Valid lineups don't depend on fpts, so with filing they are only generated once per slate and rescored after every projection change
+        Optional:
+            - filing: Filing to save/load lineups with (see lineups.FeasibleCache), generated every time without it
+            - refresh: generate again even if saved (default: False)
+            - order: order slots are filled in, see fill_slots
+        """
+        if kwargs.get('filing') is None:
+            return self.generate(order=kwargs.get('order', 'auto'))
+
+        cache = FeasibleCache(kwargs['filing'], 'draftkings', rules=self.rules())
+        pool = None if kwargs.get('refresh', False) else cache.get(self.data, sum_cols=self.sum_cols)
+
+        if pool is None:
+            pool = self.generate(order=kwargs.get('order', 'auto'))
+            cache.put(self.data, pool)
+
+        return pool
+
+    def create_pool(self, **kwargs) -> LineupPool:
+        """
+        Creates all valid lineups as a LineupPool (player ids instead of names), sorted by fpts
+        Takes same kwargs as feasible()
+        """
+        return self.feasible(**kwargs).sort('fpts')
+
+    def solve(self, **kwargs) -> LineupPool:
+        """
+        Best lineups from mixed-integer solver instead of creating every lineup (see lineups.LineupMILP), for player pools too big to enumerate
+        Salary range and constraints from engine, every lineup solver finds still has to pass checker
+        Optional:
+            - top_n: number of lineups (default: 10)
+            - include, exclude, at_least, stacks, game_stacks: see PoolIndex.query
+            - rule: lineups have to pass instead of checker (Example: enumerable, for exactly the best lineups generate would create)
+        """
+        return (LineupMILP(self.data, self.labels, self.eligible, salary=(self.checker.mincost, self.checker.maxcost), rule=kwargs.get('rule', self.checker.check), sum_cols=self.sum_cols)
+                .solve(kwargs.get('top_n', 10), **(kwargs | {'counts': self.constraints.counts}))
+               )
+
+    def optimize(self, **kwargs) -> LineupPool:
+        """
+        Best lineups from engineDP.EngineDP (DP over salary buckets) with same data and rules, for top_n without creating every lineup
+        Only checker.check on full lineups, not checker's rules on partial lineups (check_pg_sg_sf, ...) fill_slots also drops by
+        Optional:
+            - top_n: number of lineups (default: 10)
+            - rule: every lineup also passes it (Example: enumerable, for exactly the best lineups generate would create)
+        """
+        # Not at top, engineDP imports this package's checker
+        from engineDP import EngineDP
+
+        return EngineDP(self.data, site='draftkings', rule=kwargs.get('rule', lambda names: True), **self.unpruned_kwargs()).create_pool(top_n=kwargs.get('top_n', 10))
 
-        lineups_df = pd.DataFrame(lineups, columns=self.labels)
+    def enumerable(self, names: Sequence[str]) -> bool:
+        """
+        Whether generate() creates a lineup with exactly these players: fill_slots with only them in every slot, so partial lineup rules and constraints are the same
+        """
+        slots = {label: tuple([player for player in players if player[0] in names]) for label, players in self.slot_players().items()}
+
+        # fill_slots keeps its stages with constraints, engine's own stages stay
+        stages = self.stages
+        lineups = self.fill_slots(slots)
+        self.stages = stages
 
-        lineups_df['lineup'] = lineups_df[self.labels].apply(tuple, axis=1)
-        lineups_df['ordered'] = lineups_df['lineup'].map(lambda lu: tuple(sorted(lu)))
+        return len(lineups) > 0
 
-        lineups_df = (lineups_df
-                      .drop_duplicates('ordered')
-                      .drop('ordered', axis=1)
-                     )
+    def preflight(self, **kwargs) -> Preflight:
+        """
+        Estimates stage sizes, lineups, time and memory of every engine before creating anything (see lineups.Preflight)
+        Optional:
+            - top_n: number of lineups wanted (default: None, full pool)
+            - memory: most bytes an engine can use (default: None, no limit)
+        Example:
+            - engine.preflight(top_n=150).report()
+        """
+        slots = self.slot_players()
 
-        lineups_df['fpts'] = lineups_df['lineup'].map(lambda lu: self.checker.score(lu))
-        lineups_df['salary'] = lineups_df['lineup'].map(lambda lu: self.checker.cost(lu)) # May be redundant
+        return Preflight(self.stage_order(slots), self.data, self.labels,
+                         eligible={label: len(players) for label, players in slots.items()},
+                         salary=(self.checker.mincost, self.checker.maxcost), sum_cols=len(self.sum_cols) - 2,
+                         top_n=kwargs.get('top_n'), memory=kwargs.get('memory'))
 
-        if len(self.sum_cols) > 2:
-            for col in self.sum_cols[2:]:
-                lineups_df[col] = lineups_df['lineup'].map(lambda names: sum([self.checker.pvalue(name, col) for name in names]))
+    def create_lineups(self, **kwargs):
+        """
+        Creates lineups in proper format
+        Player columns are categorical (codes are ids in self.data) and team/salary summary columns are included
+        Takes same kwargs as feasible(), with top_n only the best top_n lineups are sorted
+        With solver='milp' lineups come from solve() instead (takes its kwargs), with solver='dp' from optimize()
+        Both only use checker's rules on full lineups, so they can return lineups enumerating never creates (checker's rules on partial lineups drop them)
+        With solver='auto' engine estimated cheapest is used (see preflight), estimates kept in self.preflight_report
+        DP and MILP are then given enumerable as rule, so lineups are the same whichever engine is picked
+        """
+        solver = kwargs.get('solver')
 
-        if 'top_n' in kwargs:
+        if solver == 'auto':
+            self.preflight_report = self.preflight(**kwargs).report()
+            solver = self.preflight_report.loc[self.preflight_report['chosen'], 'engine'].iloc[0]
+            kwargs = kwargs | {'rule': self.enumerable}
 
-            return (lineups_df
-                    .sort_values('fpts', ascending=False)
-                    .head(kwargs['top_n'])
-                    .reset_index(drop=True)
-                   )
+        if solver == 'milp':
+            return self.solve(**kwargs).to_frame(summary=True)
 
-        return (lineups_df
-                .sort_values('fpts', ascending=False)
-                .reset_index(drop=True)
+        if solver == 'dp':
+            return self.optimize(**kwargs).to_frame(summary=True)
+
+        pool = self.feasible(**kwargs)
+        pool = pool.top(kwargs['top_n']) if 'top_n' in kwargs else pool.sort('fpts')
+
+        return pool.to_frame(summary=True)
+
+    def remove_players(self, pool: LineupPool, *names, **kwargs) -> LineupPool:
+        """
+        For injury news after lineups have been created
+        Drops players from engine (so they are never generated again) and returns pool without any lineup they are in
+        Optional:
+            - index: PoolIndex of pool, lineups found from player bitmaps instead of scanning id matrix
+        """
+        # Not pruned again, ids of players still in pool have to stay in data
+        self.__init__(self.data.drop([name for name in names if name in self.data.index]), **self.unpruned_kwargs())
+
+        return pool.without(*names, index=kwargs.get('index'))
+
+    def add_players(self, pool: LineupPool, players: pd.DataFrame, **kwargs) -> LineupPool:
+        """
+        For players ruled in after lineups have been created (Example: taken off inactive list)
+        Takes rows for new players (same columns as data engine was created with), adds them to engine
+        Only lineups with a new player are generated, then combined with pool
+        Lineups in pool are kept as they are, so pruning bounds from a new cheapest player don't reach them
+        Returns pool sorted by fpts
+        Optional:
+            - check: also run full generate() and raise ValueError if it has a lineup that isn't in returned pool (default: False)
+        """
+        self.__init__(pd.concat([self.data, players.loc[~players.index.isin(self.data.index)]]), **self.unpruned_kwargs())
+
+        new = self.generate(including=list(players.index))
+
+        pool = (LineupPool
+                .concat([pool.remap(self.data), new], sum_cols=self.sum_cols)
+                .dedupe()
+                .sort('fpts')
                )
 
+        if kwargs.get('check', False):
+            missing = len(LineupPool.concat([pool, self.generate()]).dedupe()) - len(pool)
+            if missing:
+                raise ValueError(f'{missing} lineups from generate() missing after adding {list(players.index)}')
 
+        return pool
 
+    def reoptimize(self, fixed: dict[str, str], available: Sequence[str]) -> tuple[tuple[str,...], ...]:
+        """
+        Every valid lineup with fixed {slot: name} players in their slots and only available players in every other slot
+        """
+        slots = {
+            label: ((fixed[label],),) if label in fixed else tuple([player for player in players if player[0] in available])
+            for label, players in self.slot_players().items()
+        }
 
+        return self.fill_slots(slots)
 
+    def late_swap(self, pool: LineupPool, **kwargs) -> LineupPool:
+        """
+        Re-optimizes lineups already uploaded, only swapping players whose games haven't started
+        Takes same kwargs as lineups.LateSwap (locked, locked_teams, workers, unique)
+        Example:
+            - engine.late_swap(uploaded, locked_teams=['BOS', 'NY', 'DEN', 'LAL'])
+        """
+        return LateSwap(self, **kwargs).run(pool)
 
+    def annotate(self, lineups: pd.DataFrame|LineupPool, *attrs) -> pd.DataFrame:
+        """
+        Adds attributes to every lineup, computed in one batch from id matrix (see lineups.LineupAnalytics)
+        Takes either LineupPool or dataframe from create_lineups
+        Example:
+            - engine.annotate(engine.create_lineups(top_n=10), 'n_teams', 'n_games', 'distro', 'salaries', 'C-salary')
+        """
+        if isinstance(lineups, LineupPool):
+            return lineups.annotate(*attrs)
 
+        pool = LineupPool.from_frame(lineups, self.data, self.labels)
 
+        return lineups.assign(**pool.analytics().annotate(*attrs))
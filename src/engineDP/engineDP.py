@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+
+from lineups import LineupPool, Constraints
+
+from engineDK.checker import Checker as CheckerDK
+from engineFD.checker import Checker as CheckerFD
+
+
+# Roster for each site: slots in order, positions that can fill each slot, salary cap rules and checker used for final rules
+SITES = {
+    'draftkings': {
+        'labels': ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F', 'UTIL'],
+        'upload_labels': ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F', 'UTIL'],
+        'eligible': {
+            'PG': ('PG',), 'SG': ('SG',), 'SF': ('SF',), 'PF': ('PF',), 'C': ('C',),
+            'G': ('PG', 'SG'), 'F': ('SF', 'PF'), 'UTIL': ('PG', 'SG', 'SF', 'PF', 'C'),
+        },
+        'team_max': None,
+        'checker': CheckerDK,
+    },
+    'fanduel': {
+        'labels': ['PG1', 'PG2', 'SG1', 'SG2', 'SF1', 'SF2', 'PF1', 'PF2', 'C'],
+        'upload_labels': ['PG', 'PG', 'SG', 'SG', 'SF', 'SF', 'PF', 'PF', 'C'],
+        'eligible': {
+            'PG1': ('PG',), 'PG2': ('PG',), 'SG1': ('SG',), 'SG2': ('SG',),
+            'SF1': ('SF',), 'SF2': ('SF',), 'PF1': ('PF',), 'PF2': ('PF',), 'C': ('C',),
+        },
+        'team_max': 4,
+        'checker': CheckerFD,
+    },
+}
+
+
+class EngineDP:
+
+    def __init__(self, data: pd.DataFrame, **kwargs) -> None:
+        """
+        Top-K engine for either site, dynamic programming over roster slots and salary buckets (100s) instead of enumerating every lineup
+        Takes same contest dataframe as EngineDK/EngineFD: [pos, salary, team, fpts] indexed by name
+        Slots are filled one at a time, keeping the k best partial rosters for every (slot, salary bucket):
+            - Duplicates, team limit and slot symmetry checked when a player is added to a partial roster
+            - Partial rosters that can't reach min salary or can't stay under cap with cheapest players left are dropped
+        Result is exact: whenever a bucket overflows, best dropped partial plus best possible completion (upper bound ignoring duplicates) is tracked,
+        and k is doubled until every returned lineup beats that bound
+        Optional:
+            - site: 'draftkings' or 'fanduel' (default: draftkings)
+            - past: same as other engines, passed to site's Checker for final rules (default: True)
+            - team_max: max players from a team (default: 4 on fanduel, no limit on draftkings)
+            - sum_cols: columns totaled for every lineup, fpts and salary always included
+            - constraints: same as EngineDK/EngineFD (see lineups.Constraints), excluded players never fill a slot and every lineup returned follows the rest
+            - rule: function taking tuple of names and returning bool, every lineup returned also passes it (Example: EngineFD.enumerable)
+            - any other kwargs passed to site's Checker (Example: bad_teammates)
+        Example:
+            - EngineDP(contest_df, site='fanduel', past=False).create_lineups(top_n=150)
+        """
+        self.site = kwargs.get('site', 'draftkings')
+        self.PAST = kwargs.get('past', True)
+
+        df = data.copy(deep=True)
+
+        if 'opp' in df.columns:
+            # If ValueError, check to see if self.data.empty
+            df['game'] = df[['team', 'opp']].apply(lambda row: '-'.join(sorted([row.iloc[0], row.iloc[1]])), axis=1)
+
+        if (df['salary'] % 100).any():
+            raise ValueError('Salaries have to be multiples of 100')
+
+        self.data = df
+
+        roster = SITES[self.site]
+        self.labels = roster['labels']
+        self.upload_labels = roster['upload_labels']
+        self.team_max = kwargs.get('team_max', roster['team_max'])
+        self.checker = roster['checker'](df, **{key: value for key, value in kwargs.items() if key not in ('site', 'team_max', 'sum_cols', 'constraints', 'rule')})
+        self.constraints = Constraints(df, **kwargs.get('constraints', dict()))
+        self.rule = kwargs.get('rule', lambda names: True)
+
+        self.sum_cols = sum([
+            ['fpts', 'salary'],
+            kwargs.get('sum_cols', list())
+        ], list())
+
+        # Player arrays, position in data is player id
+        self.salaries = (df['salary'] // 100).to_numpy().astype(np.int64)
+        self.fpts = df['fpts'].to_numpy().astype(np.float64)
+        self.teams = pd.factorize(df['team'])[0]
+
+        # eligible[p, j] -> player p can fill slot j
+        self.eligible = np.column_stack([
+            df['pos'].map(lambda pos_: any([pos in pos_ for pos in roster['eligible'][label]])).to_numpy(dtype=bool)
+            for label in self.labels
+        ])
+
+        # Same as EngineFD's generator: center never less than 4_800 when not looking at past slates
+        if self.site == 'fanduel' and not self.PAST:
+            self.eligible[:, self.labels.index('C')] &= df['salary'].to_numpy() >= 4_800
+
+        # Players no lineup can have never fill a slot
+        self.eligible[df.index.isin([name for names, _, hi in self.constraints.counts if hi == 0 for name in names])] = False
+
+        self.min_bucket, self.max_bucket = self.checker.mincost // 100, self.checker.maxcost // 100
+
+        return None
+
+# ------------------------------- Bounds -------------------------------
+
+    def upper_bounds(self) -> np.ndarray:
+        """
+        Matrix of shape (n_slots+1, max_bucket+1), [j, b] is best fpts possible filling slots j and after with at most b salary buckets
+        Ignores duplicates and team limit, so it is only ever too high (safe for deciding what can be dropped)
+        """
+        n_slots = len(self.labels)
+
+        bounds = np.full((n_slots + 1, self.max_bucket + 1), -np.inf)
+        bounds[n_slots] = 0.0
+
+        for j in reversed(range(n_slots)):
+            for player in np.flatnonzero(self.eligible[:, j]):
+                salary = self.salaries[player]
+                bounds[j, salary:] = np.maximum(bounds[j, salary:], self.fpts[player] + bounds[j + 1, :self.max_bucket + 1 - salary])
+
+        return bounds
+
+    def remaining(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cheapest and most expensive salary (buckets) to fill slots j and after, for dropping partial rosters that can't end up in salary range
+        """
+        n_slots = len(self.labels)
+
+        cheapest, priciest = np.zeros(n_slots + 1, dtype=np.int64), np.zeros(n_slots + 1, dtype=np.int64)
+
+        for j in reversed(range(n_slots)):
+            salaries = self.salaries[self.eligible[:, j]]
+            cheapest[j] = cheapest[j + 1] + (salaries.min() if len(salaries) else self.max_bucket + 1)
+            priciest[j] = priciest[j + 1] + (salaries.max() if len(salaries) else 0)
+
+        return cheapest, priciest
+
+# ------------------------------- Search -------------------------------
+
+    def extend(self, ids: np.ndarray, scores: np.ndarray, buckets: np.ndarray, j: int, cheapest: np.ndarray, priciest: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Adds every eligible player for slot j to every partial roster, returns only additions that follow the rules
+        Done in chunks of partial rosters so the (partial, player) pairs never get too big
+        """
+        players = np.flatnonzero(self.eligible[:, j])
+        chunk = max(1, 2_000_000 // max(len(players), 1))
+
+        new_ids, new_scores, new_buckets = list(), list(), list()
+
+        for start in range(0, len(scores), chunk):
+            partial = np.arange(start, min(start + chunk, len(scores)))
+
+            rows = np.repeat(partial, len(players))
+            adds = np.tile(players, len(partial))
+
+            # Salary: still reachable min, still under cap with cheapest players for rest of slots
+            salary = buckets[rows] + self.salaries[adds]
+            keep = (salary + cheapest[j + 1] <= self.max_bucket) & (salary + priciest[j + 1] >= self.min_bucket)
+
+            rows, adds, salary = rows[keep], adds[keep], salary[keep]
+
+            # Duplicates and team limit
+            members = ids[rows]
+            keep = ~(members == adds[:, None]).any(axis=1)
+
+            # Same players in swapped slots (PG1/PG2, PG/SG player at PG or G, ...) only built one way:
+            # player can't go after someone they could trade slots with unless their id is higher
+            # Assignment of a set of players minimizing sum(slot weight * id) always passes, so no set of players is lost
+            swappable = self.eligible[adds][:, :j] & self.eligible[members, j]
+            keep &= ~(swappable & (adds[:, None] < members)).any(axis=1)
+
+            if self.team_max is not None:
+                keep &= (self.teams[members] == self.teams[adds][:, None]).sum(axis=1) < self.team_max
+
+            rows, adds, salary = rows[keep], adds[keep], salary[keep]
+
+            new_ids.append(np.column_stack([ids[rows], adds]))
+            new_scores.append(scores[rows] + self.fpts[adds])
+            new_buckets.append(salary)
+
+        return (np.concatenate(new_ids).astype(np.int16) if new_ids else np.empty((0, j + 1), dtype=np.int16),
+                np.concatenate(new_scores) if new_scores else np.empty(0),
+                np.concatenate(new_buckets) if new_buckets else np.empty(0, dtype=np.int64))
+
+    def search(self, k: int) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Runs DP keeping k partial rosters per (slot, salary bucket)
+        Returns ids and fpts of every complete roster kept (best first), and bound every lineup left out is at or below
+        """
+        bounds = self.upper_bounds()
+        cheapest, priciest = self.remaining()
+
+        ids = np.empty((1, 0), dtype=np.int16)
+        scores, buckets = np.zeros(1), np.zeros(1, dtype=np.int64)
+
+        # Best a dropped partial roster could have ended up as
+        dropped = -np.inf
+
+        for j in range(len(self.labels)):
+            ids, scores, buckets = self.extend(ids, scores, buckets, j, cheapest, priciest)
+
+            # Rank within each salary bucket, best first
+            order = np.lexsort((-scores, buckets))
+            ids, scores, buckets = ids[order], scores[order], buckets[order]
+
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            ranks = np.arange(len(scores)) - np.repeat(starts, np.diff(np.r_[starts, len(scores)]))
+
+            # Best of what gets dropped in every bucket is the one ranked k
+            overflow = ranks == k
+            if overflow.any():
+                dropped = max(dropped, (scores[overflow] + bounds[j + 1, self.max_bucket - buckets[overflow]]).max())
+
+            ids, scores, buckets = ids[ranks < k], scores[ranks < k], buckets[ranks < k]
+
+        order = np.argsort(-scores, kind='stable')
+
+        return ids[order], scores[order], dropped
+
+    def optimize(self, top_n: int) -> np.ndarray:
+        """
+        Returns ids of best top_n lineups (different sets of players) that pass site's checker, constraints and rule, best first
+        """
+        k = max(top_n, 8)
+
+        while True:
+            ids, scores, dropped = self.search(k)
+
+            # Same players in different slots (Example: PG/SG at PG or G) kept once, first is best
+            _, first = np.unique(np.sort(ids, axis=1), axis=0, return_index=True)
+            first = np.sort(first)
+
+            # Only lineups at or above bound are guaranteed to be in order with everything that was dropped
+            first = first[scores[first] >= dropped]
+
+            names = self.data.index.to_numpy()[ids[first]]
+            valid = [i for i, lineup in zip(first, names) if self.checker.check(tuple(lineup)) and self.constraints.check(lineup) and self.rule(tuple(lineup))][:top_n]
+
+            if len(valid) == top_n or dropped == -np.inf:
+                return ids[valid]
+
+            k *= 2
+
+    def create_pool(self, **kwargs) -> LineupPool:
+        """
+        Creates best lineups as a LineupPool, sorted by fpts
+        Optional:
+            - top_n: number of lineups (default: 10)
+        """
+        return LineupPool(self.optimize(kwargs.get('top_n', 10)), self.data, self.labels, sum_cols=self.sum_cols).sort('fpts')
+
+    def create_lineups(self, **kwargs):
+        """
+        Creates lineups in proper format, same as other engines
+        Player columns are categorical (codes are ids in self.data) and team/salary summary columns are included
+        """
+        return self.create_pool(**kwargs).to_frame(summary=True)
+
+    def annotate(self, lineups: pd.DataFrame|LineupPool, *attrs) -> pd.DataFrame:
+        """
+        Adds attributes to every lineup, computed in one batch from id matrix (see lineups.LineupAnalytics)
+        Takes either LineupPool or dataframe from create_lineups
+        """
+        if isinstance(lineups, LineupPool):
+            return lineups.annotate(*attrs)
+
+        pool = LineupPool.from_frame(lineups, self.data, self.labels)
+
+        return lineups.assign(**pool.analytics().annotate(*attrs))
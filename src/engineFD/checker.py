@@ -52,12 +52,9 @@ class Checker:
             (3, 6)
         )
 
-        # TODO: Export to own file
-        self.BAD_TEAMMATES = (
-            ('foo', 'bar'),
-        )
-
-        self.BAD_TEAMMATES = tuple([tuple(sorted(duo)) for duo in self.BAD_TEAMMATES])
+        # Teammates that correlate badly, usually from features.Correlations.bad_teammates()
+        # Set of sorted duos so checking a pair is a single hash lookup
+        self.BAD_TEAMMATES = frozenset([tuple(sorted(duo)) for duo in kwargs.get('bad_teammates', (('foo', 'bar'),))])
 
         # self.four_max_cost = (60_000 - 5*self.minimum_salary) - self.cost_range
         # self.eight_max_cost = (60_000 - self.minimum_salary) - self.cost_range
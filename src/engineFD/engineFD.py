@@ -1,3 +1,5 @@
+import os
+
 import numpy as np
 import pandas as pd
 
@@ -6,6 +8,11 @@ import itertools
 from functools import cache
 from tqdm.notebook import tqdm
 
+from lineups import LineupPool, FeasibleCache, LateSwap, LineupMILP, Dominance, Preflight, Constraints
+
+from typing import Any
+from collections.abc import Sequence
+
 from .checker import Checker
 from .generator import Generator
 
@@ -20,12 +27,29 @@ class EngineFD:
         POSITIONS = ('PG', 'SG', 'SF', 'PF', 'C')
 
         self.data = data.copy(deep=True)
+        # Kept so engine can be rebuilt when players are added or removed
+        self.kwargs = kwargs
+
+        # Unique so every slot is its own column
+        self.labels = ['PG1', 'PG2', 'SG1', 'SG2', 'SF1', 'SF2', 'PF1', 'PF2', 'C']
+        # Positions that can fill each slot
+        self.eligible = {label: (label.rstrip('12'),) for label in self.labels}
 
         if 'opp' in self.data.columns:
             # If ValueError, check to see if self.data.empty
             self.data['game'] = self.data[['team', 'opp']].apply(lambda row: '-'.join(sorted([row.iloc[0], row.iloc[1]])), axis=1)
 
-        self.labels = ['PG', 'PG', 'SG', 'SG', 'SF', 'SF', 'PF', 'PF', 'C']
+        # constraints={include, exclude, groups, stacks, bring_backs, bans, ...} enforced while lineups are filled (see lineups.Constraints)
+        self.constraints = Constraints(self.data, **kwargs.get('constraints', dict()))
+
+        # prune=top_n drops players that can't be in best top_n lineups before anything is built, what was removed is in self.pruned
+        self.pruned = pd.DataFrame()
+        if 'prune' in kwargs:
+            self.data = self.prune(self.data, kwargs['prune'])
+            self.constraints = Constraints(self.data, **kwargs.get('constraints', dict()))
+
+        # Headers for csv uploaded to site
+        self.upload_labels = ['PG', 'PG', 'SG', 'SG', 'SF', 'SF', 'PF', 'PF', 'C']
         self.sum_cols = sum([
             ['fpts', 'salary'],
             kwargs.get('sum_cols', list())
@@ -42,39 +66,261 @@ class EngineFD:
             self.data = self.data.drop(pos, axis=1)
 
         self.checker = Checker(self.data, **kwargs)
-        self.generator = Generator(self.pos_players, self.checker)
+        self.generator = Generator(self.pos_players, self.checker, counts=self.constraints.counts)
+        # Estimates of every engine from last create_lineups(solver='auto'), see preflight
+        self.preflight_report = pd.DataFrame()
+
+    def prune(self, df: pd.DataFrame, top_n: int) -> pd.DataFrame:
+        """
+        Returns players without any that can't be in best top_n lineups (see lineups.Dominance), removed players kept in self.pruned
+        Salary range and team max from checker
+        Every slot but C is in a partial lineup checker bounds by cost (check4, check8), so only dominators with same salary count there
+        When not PAST, checker also has rules on team distros and bad teammates and generator on center salary:
+            - only teammates count as dominators (swapping keeps teams and games of lineup the same)
+            - players in bad teammate pairs never count as dominators
+            - center has to be at least 4_800, same as generator
+        Players in constraints are never dropped and never count as dominators
+        """
+        checker = Checker(df, **self.kwargs)
+
+        dominance = Dominance(df, self.labels, self.eligible, top_n=top_n, salary=(checker.mincost, checker.maxcost), team_max=checker.TEAM_MAX,
+                              same_team=(not checker.PAST), fixed_salary=[label for label in self.labels if label != 'C'],
+                              exclude=(self.constraints.names() if checker.PAST else self.constraints.names() | set(sum([list(duo) for duo in checker.BAD_TEAMMATES], list()))),
+                              keep=self.constraints.names(),
+                              restrict=(dict() if checker.PAST else {'C': df['salary'].to_numpy() >= 4_800}))
+        df = dominance.prune()
+        self.pruned = dominance.removed
+
+        return df
+
+    def unpruned_kwargs(self) -> dict[str, Any]:
+        """
+        kwargs engine was created with, without prune (for rebuilding engine around lineups already created)
+        """
+        return {key: value for key, value in self.kwargs.items() if key != 'prune'}
+
+    def rules(self) -> dict[str, Any]:
+        """
+        Everything other than the player table that decides which lineups are valid, part of FeasibleCache key
+        Source of engine package and of lineups modules that fill lineups (see FeasibleCache.GENERATION) is included, so editing either regenerates saved lineups
+        """
+        return {
+            'engine': type(self).__name__,
+            'past': self.checker.PAST,
+            'bad_teammates': sorted(self.checker.BAD_TEAMMATES),
+            'constraints': self.constraints.rules(),
+            'source': FeasibleCache.source_hash(os.path.dirname(__file__)),
+            'generation': FeasibleCache.generation_hash(),
+        }
+
+    def generate(self, **kwargs) -> LineupPool:
+        """
+        Creates all valid lineups as a LineupPool (player ids instead of names), in generation order
+        Lineups with the same players in a different order are dropped
+        Optional:
+            - including: only lineups with at least one of these players, each is fixed at every position they play and only the other positions are enumerated
+            - order: order positions are filled in, see Generator.lineups (default: 'auto', chosen order and estimates in self.generator.stages.order/self.generator.stages.report)
+        """
+        if 'including' not in kwargs:
+            lineups = self.generator.lineups(order=kwargs.get('order', 'auto'))
+        else:
+            lineups = sum([
+                Generator(self.pos_players, self.checker, fixed={pos: (name,)}, counts=self.constraints.counts).lineups(order=kwargs.get('order', 'auto'))
+                for name in kwargs['including']
+                for pos, players in self.pos_players.items() if name in players
+            ], tuple())
+
+        return (LineupPool
+                .from_names(lineups, self.data, self.labels, sum_cols=self.sum_cols)
+                .dedupe()
+               )
+
+    def feasible(self, **kwargs) -> LineupPool:
+        """
+        All valid lineups scored with self.data, unsorted
+        Valid lineups don't depend on fpts, so with filing they are only generated once per slate and rescored after every projection change
+        Optional:
+            - filing: Filing to save/load lineups with (see lineups.FeasibleCache), generated every time without it
+            - refresh: generate again even if saved (default: False)
+            - order: order positions are filled in, see generate
+        """
+        if kwargs.get('filing') is None:
+            return self.generate(order=kwargs.get('order', 'auto'))
+
+        cache = FeasibleCache(kwargs['filing'], 'fanduel', rules=self.rules())
+        pool = None if kwargs.get('refresh', False) else cache.get(self.data, sum_cols=self.sum_cols)
+
+        if pool is None:
+            pool = self.generate(order=kwargs.get('order', 'auto'))
+            cache.put(self.data, pool)
+
+        return pool
+
+    def create_pool(self, **kwargs) -> LineupPool:
+        """
+        Creates all valid lineups as a LineupPool (player ids instead of names), sorted by fpts
+        Takes same kwargs as feasible()
+        """
+        return self.feasible(**kwargs).sort('fpts')
+
+    def follows_generator(self, names: tuple[str,...]) -> bool:
+        """
+        Rules lineups from generator always follow: checker, and center never less than 4_800 unless PAST
+        """
+        return self.checker.check(names) and (self.checker.PAST or self.checker.pvalue(names[-1], 'salary') >= 4_800)
+
+    def solve(self, **kwargs) -> LineupPool:
+        """
+        Best lineups from mixed-integer solver instead of creating every lineup (see lineups.LineupMILP), for player pools too big to enumerate
+        Salary range and team max from checker, center salary, number of teams and constraints same as generator, every lineup solver finds still has to pass same rules as generator
+        Optional:
+            - top_n: number of lineups (default: 10)
+            - include, exclude, at_least, stacks, game_stacks: see PoolIndex.query
+            - rule: lineups have to pass instead of follows_generator (Example: enumerable, for exactly the best lineups generate would create)
+        """
+        return (LineupMILP(self.data, self.labels, self.eligible, salary=(self.checker.mincost, self.checker.maxcost), team_max=self.checker.TEAM_MAX,
+                           restrict=(dict() if self.checker.PAST else {'C': self.data['salary'].to_numpy() >= 4_800}),
+                           # Checker only takes 4 team distros when not PAST
+                           max_teams=(None if self.checker.PAST else 4), rule=kwargs.get('rule', self.follows_generator), sum_cols=self.sum_cols)
+                .solve(kwargs.get('top_n', 10), **(kwargs | {'counts': self.constraints.counts}))
+               )
+
+    def optimize(self, **kwargs) -> LineupPool:
+        """
+        Best lineups from engineDP.EngineDP (DP over salary buckets) with same data and rules (checker, center salary), for top_n without creating every lineup
+        Only checker.check on full lineups, not checker's rules on partial lineups (check4, check8) generator also drops by
+        Optional:
+            - top_n: number of lineups (default: 10)
+            - rule: every lineup also passes it (Example: enumerable, for exactly the best lineups generate would create)
+        """
+        # Not at top, engineDP imports this package's checker
+        from engineDP import EngineDP
+
+        return EngineDP(self.data, site='fanduel', rule=kwargs.get('rule', lambda names: True), **self.unpruned_kwargs()).create_pool(top_n=kwargs.get('top_n', 10))
+
+    def enumerable(self, names: Sequence[str]) -> bool:
+        """
+        Whether generate() creates a lineup with exactly these players: generator with only them at every position, so partial lineup rules and constraints are the same
+        """
+        players = {pos: tuple([name for name in players if name in names]) for pos, players in self.pos_players.items()}
+
+        return len(Generator(players, self.checker, counts=self.constraints.counts).lineups()) > 0
+
+    def preflight(self, **kwargs) -> Preflight:
+        """
+        Estimates stage sizes, lineups, time and memory of every engine before creating anything (see lineups.Preflight)
+        Optional:
+            - top_n: number of lineups wanted (default: None, full pool)
+            - memory: most bytes an engine can use (default: None, no limit)
+        Example:
+            - engine.preflight(top_n=150).report()
+        """
+        eligible = {label: len(self.pos_players[label.rstrip('12')]) for label in self.labels} | {'C': len(self.generator.centers())}
+
+        return Preflight(self.generator.stage_order(), self.data, self.labels, eligible=eligible,
+                         salary=(self.checker.mincost, self.checker.maxcost), sum_cols=len(self.sum_cols) - 2,
+                         top_n=kwargs.get('top_n'), memory=kwargs.get('memory'))
 
     def create_lineups(self, **kwargs):
+        """
+        Creates lineups in proper format
+        Player columns are categorical (codes are ids in self.data) and team/salary summary columns are included
+        Takes same kwargs as feasible(), with top_n only the best top_n lineups are sorted
+        With solver='milp' lineups come from solve() instead (takes its kwargs), with solver='dp' from optimize()
+        Both only use checker's rules on full lineups, so they can return lineups enumerating never creates (checker's rules on partial lineups drop them)
+        With solver='auto' engine estimated cheapest is used (see preflight), estimates kept in self.preflight_report
+        DP and MILP are then given enumerable as rule, so lineups are the same whichever engine is picked
+        """
+        solver = kwargs.get('solver')
+
+        if solver == 'auto':
+            self.preflight_report = self.preflight(**kwargs).report()
+            solver = self.preflight_report.loc[self.preflight_report['chosen'], 'engine'].iloc[0]
+            kwargs = kwargs | {'rule': self.enumerable}
 
-        lineups = pd.DataFrame(self.generator.lineups(), columns=self.labels)
+        if solver == 'milp':
+            return self.solve(**kwargs).to_frame(summary=True)
 
-        lineups['lineup'] = lineups[self.labels].apply(tuple, axis=1)
-        lineups['lineup'] = lineups['lineup'].map(lambda x: self.checker.order(x))
+        if solver == 'dp':
+            return self.optimize(**kwargs).to_frame(summary=True)
 
+        pool = self.feasible(**kwargs)
+        pool = pool.top(kwargs['top_n']) if 'top_n' in kwargs else pool.sort('fpts')
 
-        lineups['salary'] = lineups['lineup'].map(lambda x: self.checker.cost(x))
-        lineups['fpts'] = lineups['lineup'].map(lambda names: sum([self.checker.pvalue(name, 'fpts') for name in names]))
+        return pool.to_frame(summary=True)
 
-        # if 'e_fpts' in self.sum_cols:
-        if len(self.sum_cols) > 2:
-            for col in self.sum_cols[2:]:
-                lineups[col] = lineups['lineup'].map(lambda names: sum([self.checker.pvalue(name, col) for name in names]))
-        
-        lineups = lineups.sort_values('fpts', ascending=False)
+    def remove_players(self, pool: LineupPool, *names, **kwargs) -> LineupPool:
+        """
+        For injury news after lineups have been created
+        Drops players from engine (so they are never generated again) and returns pool without any lineup they are in
+        Optional:
+            - index: PoolIndex of pool, lineups found from player bitmaps instead of scanning id matrix
+        """
+        # Not pruned again, ids of players still in pool have to stay in data
+        self.__init__(self.data.drop([name for name in names if name in self.data.index]), **self.unpruned_kwargs())
 
-        lineups = (lineups
-                   .drop_duplicates(subset=['lineup']) # Same team in different order
-                   .drop('lineup', axis=1)
-                  )
+        return pool.without(*names, index=kwargs.get('index'))
 
-        if 'top_n' in kwargs:
+    def add_players(self, pool: LineupPool, players: pd.DataFrame, **kwargs) -> LineupPool:
+        """
+        For players ruled in after lineups have been created (Example: taken off inactive list)
+        Takes rows for new players (same columns as data engine was created with), adds them to engine
+        Only lineups with a new player are generated, then combined with pool
+        Lineups in pool are kept as they are, so pruning bounds from a new cheapest player don't reach them
+        Returns pool sorted by fpts
+        Optional:
+            - check: also run full generate() and raise ValueError if it has a lineup that isn't in returned pool (default: False)
+        """
+        self.__init__(pd.concat([self.data, players.loc[~players.index.isin(self.data.index)]]), **self.unpruned_kwargs())
+
+        new = self.generate(including=list(players.index))
+
+        pool = (LineupPool
+                .concat([pool.remap(self.data), new], sum_cols=self.sum_cols)
+                .dedupe()
+                .sort('fpts')
+               )
+
+        if kwargs.get('check', False):
+            missing = len(LineupPool.concat([pool, self.generate()]).dedupe()) - len(pool)
+            if missing:
+                raise ValueError(f'{missing} lineups from generate() missing after adding {list(players.index)}')
+
+        return pool
+
+    def reoptimize(self, fixed: dict[str, str], available: Sequence[str]) -> tuple[tuple[str,...], ...]:
+        """
+        Every valid lineup with fixed {slot: name} players at their positions and only available players everywhere else
+        Slots are unique labels (PG1, PG2, ...), position is label without number
+        """
+        fixed_pos = {pos: tuple([name for label, name in fixed.items() if label.rstrip('12') == pos]) for pos in self.pos_players}
+
+        players = {
+            pos: tuple([name for name in names if name in available]) + fixed_pos[pos]
+            for pos, names in self.pos_players.items()
+        }
+
+        return Generator(players, self.checker, fixed=fixed_pos, counts=self.constraints.counts).lineups()
+
+    def late_swap(self, pool: LineupPool, **kwargs) -> LineupPool:
+        """
+        Re-optimizes lineups already uploaded, only swapping players whose games haven't started
+        Takes same kwargs as lineups.LateSwap (locked, locked_teams, workers, unique)
+        Example:
+            - engine.late_swap(uploaded, locked_teams=['BOS', 'NY', 'DEN', 'LAL'])
+        """
+        return LateSwap(self, **kwargs).run(pool)
+
+    def annotate(self, lineups: pd.DataFrame|LineupPool, *attrs) -> pd.DataFrame:
+        """
+        Adds attributes to every lineup, computed in one batch from id matrix (see lineups.LineupAnalytics)
+        Takes either LineupPool or dataframe from create_lineups
+        Example:
+            - engine.annotate(engine.create_lineups(top_n=10), 'n_teams', 'n_games', 'distro', 'salaries', 'C-salary')
+        """
+        if isinstance(lineups, LineupPool):
+            return lineups.annotate(*attrs)
 
-            return (lineups
-                    .sort_values('fpts', ascending=False)
-                    .head(kwargs['top_n'])
-                    .reset_index(drop=True)
-                   )
+        pool = LineupPool.from_frame(lineups, self.data, self.labels)
 
-        return lineups
-        
-            
\ No newline at end of file
+        return lineups.assign(**pool.analytics().annotate(*attrs))
@@ -11,24 +11,32 @@ Form:
 
 
 import numpy as np
-import pandas as pd
 
 import itertools
 
 from collections.abc import Sequence
 from typing import Any
 
+from lineups import StageOrder
+
 class Generator:
-    def __init__(self, players: dict[str, tuple[str,...]], checker) -> None:
+    def __init__(self, players: dict[str, tuple[str,...]], checker, **kwargs) -> None:
         """
         Class to deal with the generation of lineups, including checking if valid or not
         Parameters:
             - Dictionary containing position players
             - Checker object to do checking of lineups
+        Optional:
+            - fixed: {pos: names} only lineups with every one of names at pos are created, every other position enumerated as usual
+            - counts: (names, min, max) from lineups.Constraints, enforced while positions are filled (see stage_order)
         """
         
         self.players = players
         self.checker = checker
+        self.fixed = kwargs.get('fixed', dict())
+        self.counts = kwargs.get('counts', list())
+        # lineups.StageOrder of last lineups(), with order positions were filled in and estimates it was chosen from
+        self.stages = None
 
     def flatten(self, seq_2d: Sequence[Sequence[Any,...], ...]) -> tuple[Any, ...]:
         """
@@ -68,7 +76,12 @@ class Generator:
         Takes a position as input where it is any position but C (since only one Center in build)
         Returns a tuple of all possible pairs at that position
         """
-        return self.combos(self.players[pos], 2)
+        pairs = self.combos(self.players[pos], 2)
+
+        if self.fixed.get(pos):
+            return tuple([pair for pair in pairs if set(self.fixed[pos]) <= set(pair)])
+
+        return pairs
 
 
     def guards(self) -> tuple[tuple[str,str,str,str], ...]:
@@ -86,25 +99,87 @@ class Generator:
     def no_center(self) -> tuple[tuple[str,str,str,str,str,str,str,str], ...]:
         """
         Creates tuples of len() = 8, where all parts of lineup but center
+        Join of guards and forwards on salary instead of full cross product:
+            - Forwards sorted by cost once
+            - For every guard set, forwards that land the 8 players in checker's eight cost window found with searchsorted
+            - Only those pairs go through checker (duplicates, teammates, exact cost range)
+        Same lineups in same order as cross_combos(guards, forwards)
         """
-        return self.cross_combos(self.guards(), self.forwards())
+        guards, forwards = self.guards(), self.forwards()
 
-    def lineups(self) -> tuple[tuple[str,str,str,str,str,str,str,str,str], ...]:
-        """
-        Creates full lineups with all position constraints satisfied
-        """
+        if not len(guards) or not len(forwards):
+            return tuple()
+
+        salary = {name: self.checker.pvalue(name, 'salary') for name in set(self.flatten(guards) + self.flatten(forwards))}
+
+        guard_costs = np.array([sum([salary[name] for name in guard]) for guard in guards], dtype=np.int64)
+        forward_costs = np.array([sum([salary[name] for name in forward]) for forward in forwards], dtype=np.int64)
+
+        order = np.argsort(forward_costs, kind='stable')
+        sorted_costs = forward_costs[order]
+
+        # Range of sorted forwards for every guard set, all at once
+        lo = np.searchsorted(sorted_costs, self.checker.eight_min_cost - guard_costs, side='left')
+        hi = np.searchsorted(sorted_costs, self.checker.eight_max_cost - guard_costs, side='right')
 
-        # Center never lt 5_000
+        lineups = list()
+        for i in np.flatnonzero(hi > lo):
+            # Back in original forward order so lineups come out in same order as full cross product
+            for j in np.sort(order[lo[i]:hi[i]]):
+                combo = guards[i] + forwards[j]
 
+                if self.checker.check(combo):
+                    lineups.append(combo)
+
+        return tuple(lineups)
+
+    def centers(self) -> tuple[str,...]:
+        """
+        Centers lineups are created with, never less than 4_800 unless PAST
+        """
         centers = tuple([name for name in self.players['C'] if self.checker.pvalue(name, 'salary') >= 4_800]) if not self.checker.PAST else self.players['C']
-        
-        return tuple([lineup for lineup in self.cross_combos(self.no_center(), self.combos(centers, 1)) if self.checker.check(lineup)])
 
+        if self.fixed.get('C'):
+            centers = tuple([name for name in centers if name in self.fixed['C']])
 
+        return centers
 
+    def stage_order(self) -> StageOrder:
+        """
+        Position pairs and center as stages of lineups.StageOrder, so positions can be filled in any order
+        Every check runs on the same players as guards()/forwards()/no_center() (PG+SG, SF+PF, all 8 but center, all 9)
+        Partial lineups are also dropped once they can't end up between checker's min and max cost, or can't follow counts
+        """
+        units = {pos: self.pos_pairs(pos) for pos in ('PG', 'SG', 'SF', 'PF')} | {'C': self.combos(self.centers(), 1)}
+        names = set(self.flatten([candidate for candidates in units.values() for candidate in candidates]))
 
+        return StageOrder(
+            units,
+            [
+                (('PG', 'SG'), self.checker.check),
+                (('SF', 'PF'), self.checker.check),
+                (('PG', 'SG', 'SF', 'PF'), self.checker.check),
+                (('PG', 'SG', 'SF', 'PF', 'C'), self.checker.check),
+            ],
+            {name: self.checker.pvalue(name, 'salary') for name in names},
+            salary=(self.checker.mincost, self.checker.maxcost),
+            counts=self.counts,
+        )
 
+    def lineups(self, **kwargs) -> tuple[tuple[str,str,str,str,str,str,str,str,str], ...]:
+        """
+        Creates full lineups with all position constraints satisfied
+        Same lineups in same order whatever order positions are filled in
+        With counts lineups are always filled by stage_order (only place they are enforced), 'labels' is then same order as below
+        Optional:
+            - order: 'auto' to pick from pool (see stage_order), 'labels' for guards and forwards joined on salary then center,
+              or list of positions (default: 'labels')
+        """
+        order = kwargs.get('order', 'labels')
 
+        if order != 'labels' or self.counts:
+            self.stages = self.stage_order()
 
+            return self.stages.fill(self.stages.choose() if order == 'auto' else (self.stages.units if order == 'labels' else order))
 
-        
\ No newline at end of file
+        return tuple([lineup for lineup in self.cross_combos(self.no_center(), self.combos(self.centers(), 1)) if self.checker.check(lineup)])
@@ -0,0 +1,6 @@
+from .store import FeatureStore
+from .form import PlayerForm
+from .context import LineupContext
+from .correlations import Correlations
+
+version='1.0.0'
\ No newline at end of file
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+from stats import describe
+
+
+class LineupContext:
+
+    def __init__(self, boxscores: pd.DataFrame, **kwargs) -> None:
+        """
+        Index of who started and who was active in every team-game, stored as bitsets so on/off queries never filter the season frame
+        Every player gets a bit within each team they played for, each team-game gets a starters bitset and an active bitset
+        boxscores can be several seasons concatenated (needs date, name, team, starter, mp)
+        Optional:
+            - min_mp: minutes needed to count as active, anything less counts as missing the game (default: 6.0, same as dates_without)
+        Example:
+            - context = LineupContext(pd.concat([szn2022.load(), szn2023.load()]))
+            - context.games('BOS', started=['Jayson Tatum', 'Jaylen Brown'], inactive=['Kristaps Porzingis'])
+        """
+        self.boxscores = boxscores
+        self.min_mp = kwargs.get('min_mp', 6.0)
+
+        df = boxscores[['date', 'name', 'team', 'starter', 'mp']].reset_index(drop=True)
+
+        # Bit of every player within team
+        self.players = (df[['team', 'name']]
+                        .drop_duplicates()
+                        .assign(bit=lambda df_: df_.groupby('team').cumcount())
+                        .set_index(['team', 'name'])
+                        ['bit']
+                       )
+        self.n_words = int(self.players.max()) // 64 + 1 if len(self.players) else 1
+
+        # One row per team-game, sorted so each team's games are contiguous
+        self.games_df = df[['team', 'date']].drop_duplicates().sort_values(['team', 'date']).reset_index(drop=True)
+        game = pd.MultiIndex.from_frame(self.games_df).get_indexer(pd.MultiIndex.from_frame(df[['team', 'date']]))
+
+        bit = self.players.reindex(pd.MultiIndex.from_frame(df[['team', 'name']])).to_numpy()
+        word = bit // 64
+        flag = np.left_shift(np.uint64(1), (bit % 64).astype(np.uint64))
+
+        self.starters = np.zeros((len(self.games_df), self.n_words), dtype=np.uint64)
+        self.active = np.zeros((len(self.games_df), self.n_words), dtype=np.uint64)
+
+        started = df['starter'].to_numpy() == 1
+        played = df['mp'].to_numpy() >= self.min_mp
+        np.bitwise_or.at(self.starters, (game[started], word[started]), flag[started])
+        np.bitwise_or.at(self.active, (game[played], word[played]), flag[played])
+
+        # Rows of games_df for each team
+        self.team_games = {team: rows.to_numpy() for team, rows in self.games_df.groupby('team').groups.items()}
+
+        return None
+
+    def bitset(self, team: str, names: Sequence[str]) -> np.ndarray:
+        """
+        Bitset with bit of every player in names set, names that never played for team have no bit (all zeros when none did)
+        """
+        bits = np.zeros(self.n_words, dtype=np.uint64)
+
+        for name in names:
+            if (team, name) not in self.players.index:
+                continue
+
+            bit = int(self.players[(team, name)])
+            bits[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+
+        return bits
+
+    def games(self, team: str, **kwargs) -> list[str,...]:
+        """
+        Returns dates of team games matching every condition, sorted
+        Optional:
+            - started: players that all started
+            - active: players that all played (at least min_mp)
+            - inactive: players that all missed the game (or played less than min_mp)
+            - bench: players that all played without starting
+        """
+        rows = self.team_games[team]
+        starters, active = self.starters[rows], self.active[rows]
+
+        keep = np.ones(len(rows), dtype=bool)
+
+        for condition, bitsets in (('started', starters), ('active', active), ('bench', active & ~starters)):
+            if kwargs.get(condition):
+                bits = self.bitset(team, kwargs[condition])
+                # Player that never played for team never started or played in its games, inactive in all of them (same as notebook's without)
+                played = all([(team, name) in self.players.index for name in kwargs[condition]])
+                keep &= ((bitsets & bits) == bits).all(axis=1) & played
+
+        if kwargs.get('inactive'):
+            bits = self.bitset(team, kwargs['inactive'])
+            keep &= ((active & bits) == 0).all(axis=1)
+
+        return list(self.games_df.loc[rows[keep], 'date'])
+
+    def performance(self, team: str, **kwargs) -> pd.DataFrame:
+        """
+        Stats of every player on team in games matching conditions (see games()), same layout as SeasonData.performance_with
+        Optional:
+            - player: only return this player
+            - stats: stats to describe (default: fpts, mp, fppm)
+            - any condition from games()
+        Example:
+            - performance('BOS', player='Derrick White', started=['Jrue Holiday'], inactive=['Jayson Tatum'])
+        """
+        dates = self.games(team, **kwargs)
+        stats = kwargs.get('stats', ['fpts', 'mp', 'fppm'])
+
+        rows = self.boxscores.loc[(self.boxscores['team'] == team) & self.boxscores['date'].isin(dates)]
+
+        if kwargs.get('player') is not None:
+            rows = rows.loc[rows['name'] == kwargs['player']]
+
+        return (rows
+                .pipe(describe, 'name', stats, ['count', 'min', 'floor', 'median', 'ceiling', 'max'])
+                .sort_values((stats[0], 'median'), ascending=False)
+                .drop([(stat_, 'count') for stat_ in stats[1:]], axis=1)
+                .round(2)
+               )
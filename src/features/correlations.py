@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+
+class Correlations:
+
+    # Sums kept for every pair, correlation and sample size both come from these so adding games is just adding sums
+    SUMS = ['n', 'x', 'y', 'xx', 'yy', 'xy']
+
+    def __init__(self, filing, **kwargs) -> None:
+        """
+        Game level correlation of a stat (fpts) for every pair of teammates and every pair of opponents in a season
+        Stored sparsely: one row per pair that has actually shared a game, keyed by (kind, team_a, team_b, name_a, name_b)
+            - kind: 'teammates' or 'opponents'
+            - name_a < name_b alphabetically, team_a is team of name_a
+        Saved with filing and updated with only new games
+        Optional:
+            - site: site fpts are for (default: filing.site)
+            - stat: column correlated (default: fpts)
+        Example:
+            - corr = Correlations(Filing('2023-2024'), site='fanduel').update(SeasonData(year=2023, site='fanduel').load())
+            - corr.pair('Jayson Tatum', 'Jaylen Brown')
+            - corr.top(10, kind='opponents', min_games=10)
+        """
+        self.filing = filing
+        self.site = kwargs.get('site', filing.site)
+        self.stat = kwargs.get('stat', 'fpts')
+
+        self.table = f'correlations-{self.stat}'
+        self.sums = self.filing.load('features', site=self.site, table=self.table) if self.filing.exists('features', site=self.site, table=self.table) else pd.DataFrame()
+
+        return None
+
+    @property
+    def last_date(self) -> str|None:
+        return None if self.sums.empty else self.sums['last-date'].max()
+
+    def pair_sums(self, boxscores: pd.DataFrame) -> pd.DataFrame:
+        """
+        Takes boxscores (date, name, team, opp, stat) and returns sums for every pair of players in same game
+        Pairs found with two merges on (date, team) for teammates and (date, opp) for opponents instead of looping over combinations
+        Games where either player's stat is NaN (Example: DNP) are left out of n and every sum, so correlation and n are from same games
+        """
+        games = boxscores[['date', 'name', 'team', 'opp', self.stat]].rename({self.stat: 'x'}, axis=1).dropna(subset=['x'])
+
+        a = games.rename({col: f'{col}_a' for col in games.columns if col != 'date'}, axis=1)
+        b = games.rename({col: f'{col}_b' for col in games.columns if col != 'date'}, axis=1)
+
+        pairs = (pd
+                 .concat([
+                     a.merge(b, left_on=['date', 'team_a'], right_on=['date', 'team_b']).assign(kind='teammates'),
+                     a.merge(b, left_on=['date', 'opp_a'], right_on=['date', 'team_b']).assign(kind='opponents'),
+                 ], ignore_index=True)
+                 .pipe(lambda df_: df_.loc[df_['name_a'] < df_['name_b']])
+                 .rename({'x_b': 'y'}, axis=1)
+                 .rename({'x_a': 'x'}, axis=1)
+                 .assign(
+                     n=1,
+                     xx=lambda df_: df_.x * df_.x,
+                     yy=lambda df_: df_.y * df_.y,
+                     xy=lambda df_: df_.x * df_.y,
+                 )
+                )
+
+        return (pairs
+                .groupby(['kind', 'team_a', 'team_b', 'name_a', 'name_b'])
+                .agg(**{col: (col, 'sum') for col in self.SUMS}, **{'last-date': ('date', 'max')})
+               )
+
+    def update(self, boxscores: pd.DataFrame, **kwargs):
+        """
+        Adds games after last_date in boxscores to sums (whole season or only new games can be given)
+        Optional:
+            - rebuild: start over from boxscores given (default: False)
+            - save: save to filing (default: True)
+        Returns self so calls can be chained
+        """
+        if kwargs.get('rebuild', False) or self.sums.empty:
+            new_games = boxscores
+            self.sums = pd.DataFrame()
+        else:
+            new_games = boxscores.loc[boxscores['date'] > self.last_date]
+
+        if new_games.empty:
+            return self
+
+        new_sums = self.pair_sums(new_games)
+
+        if self.sums.empty:
+            self.sums = new_sums
+        else:
+            combined = self.sums[self.SUMS].add(new_sums[self.SUMS], fill_value=0)
+            self.sums = combined.assign(**{'last-date': self.sums['last-date'].combine(new_sums['last-date'], max, fill_value='')})
+
+        self.sums = self.sums.astype({'n': 'int64'}).sort_index()
+
+        if kwargs.get('save', True):
+            self.filing.save('features', self.sums, site=self.site, table=self.table)
+
+        return self
+
+    @classmethod
+    def pearson(cls, sums: pd.DataFrame) -> pd.Series:
+        """
+        Correlation from sums, NaN when either player's stat never changed
+        """
+        covariance = sums['n'] * sums['xy'] - sums['x'] * sums['y']
+        variance = (sums['n'] * sums['xx'] - sums['x'] ** 2) * (sums['n'] * sums['yy'] - sums['y'] ** 2)
+
+        return covariance / np.sqrt(variance.where(variance > 0))
+
+    def correlations(self, **kwargs) -> pd.DataFrame:
+        """
+        Returns every pair with corr and n (games together)
+        Optional:
+            - kind: 'teammates' or 'opponents' (default: both)
+            - team: only pairs with a player on team
+            - min_games: only pairs with at least this many games together (default: 1)
+        """
+        sums = self.sums
+
+        if kwargs.get('kind') is not None:
+            sums = sums.xs(kwargs['kind'], level='kind', drop_level=False)
+
+        if kwargs.get('team') is not None:
+            teams_a, teams_b = sums.index.get_level_values('team_a'), sums.index.get_level_values('team_b')
+            sums = sums.loc[(teams_a == kwargs['team']) | (teams_b == kwargs['team'])]
+
+        sums = sums.loc[sums['n'] >= kwargs.get('min_games', 1)]
+
+        return pd.DataFrame({'corr': self.pearson(sums).round(3), 'n': sums['n']})
+
+    def pair(self, name_a: str, name_b: str) -> pd.DataFrame:
+        """
+        Correlation of two players, one row for each team combination they've shared games as (trades)
+        """
+        name_a, name_b = sorted([name_a, name_b])
+        names_a, names_b = self.sums.index.get_level_values('name_a'), self.sums.index.get_level_values('name_b')
+
+        sums = self.sums.loc[(names_a == name_a) & (names_b == name_b)]
+
+        return pd.DataFrame({'corr': self.pearson(sums).round(3), 'n': sums['n']})
+
+    def top(self, k: int = 10, **kwargs) -> pd.DataFrame:
+        """
+        k most correlated pairs (or least with ascending=True)
+        Optional:
+            - ascending: most negative first (default: False)
+            - any filter from correlations() (kind, team, min_games)
+        """
+        return (self.correlations(**kwargs)
+                .dropna()
+                .sort_values('corr', ascending=kwargs.get('ascending', False))
+                .head(k)
+               )
+
+    def matrix(self, names: Sequence[str], **kwargs) -> pd.DataFrame:
+        """
+        Square correlation matrix for names (Example: for a heatmap), pairs without games together are NaN
+        Optional:
+            - kind, team, min_games: see correlations()
+        """
+        corrs = self.correlations(**kwargs).reset_index()
+        corrs = corrs.loc[corrs['name_a'].isin(names) & corrs['name_b'].isin(names)]
+
+        # Pair can show up for more than one team combination, most games together wins
+        corrs = corrs.sort_values('n').drop_duplicates(['name_a', 'name_b'], keep='last')
+
+        names = list(names)
+        matrix = np.full((len(names), len(names)), np.nan)
+        matrix[np.diag_indices(len(names))] = 1.0
+
+        rows, cols = pd.Index(names).get_indexer(corrs['name_a']), pd.Index(names).get_indexer(corrs['name_b'])
+        matrix[rows, cols] = corrs['corr'].to_numpy()
+        matrix[cols, rows] = corrs['corr'].to_numpy()
+
+        return pd.DataFrame(matrix, index=names, columns=names)
+
+    def bad_teammates(self, threshold: float = -0.3, min_games: int = 10) -> frozenset[tuple[str, str]]:
+        """
+        Teammate pairs with correlation at or below threshold over at least min_games, ready for Checker(bad_teammates=...)
+        Pairs are sorted tuples so lookups in the checker are a single set membership test
+        """
+        corrs = self.correlations(kind='teammates', min_games=min_games)
+        corrs = corrs.loc[corrs['corr'] <= threshold]
+
+        return frozenset(zip(corrs.index.get_level_values('name_a'), corrs.index.get_level_values('name_b')))
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+
+class PlayerForm:
+
+    # Last n games averages kept for every player and date, along with season to date
+    WINDOWS = (5, 10, 20)
+    STATS = ('fpts', 'mp', 'fppm', 'usg')
+
+    def __init__(self, filing, **kwargs) -> None:
+        """
+        Rolling form (last 5/10/20 games and season to date averages) of every player after every game they played
+        Built once over all boxscores for season and saved with filing, after that form on any date is a lookup
+        Lookups only use games before date asked for, so backtests never see the game being predicted
+        Optional:
+            - site: site fpts are for (default: filing.site)
+            - windows: game windows (default: WINDOWS)
+            - stats: stats averaged (default: STATS)
+        Example:
+            - form = PlayerForm(Filing('2023-2024'), site='draftkings').build(SeasonData(year=2023).load())
+            - form.lookup(contest_df.index, '2024-01-15')
+        """
+        self.filing = filing
+        self.site = kwargs.get('site', filing.site)
+        self.windows = tuple(kwargs.get('windows', self.WINDOWS))
+        self.stats = list(kwargs.get('stats', self.STATS))
+
+        self.form = self.filing.load('features', site=self.site, table='form') if self.filing.exists('features', site=self.site, table='form') else pd.DataFrame()
+
+        return None
+
+    @classmethod
+    def window_means(cls, values: np.ndarray, starts: np.ndarray, window: int|None) -> np.ndarray:
+        """
+        Takes values sorted by player then date and index of first game of each row's player
+        Returns average of each row and up to window-1 games before it (whole season if window is None) from cumulative sums
+        Missing stats (NaN, Example: DNP minutes) are left out of the sum and of the count, NaN only when every game in window is missing
+        """
+        missing = np.isnan(values)
+        cumsum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(np.where(missing, 0.0, values), axis=0)])
+        cumcount = np.vstack([np.zeros((1, values.shape[1]), dtype=np.int64), np.cumsum(~missing, axis=0)])
+        rows = np.arange(len(values))
+
+        first = starts if window is None else np.maximum(starts, rows - window + 1)
+        n_games = cumcount[rows + 1] - cumcount[first]
+
+        return np.where(n_games > 0, (cumsum[rows + 1] - cumsum[first]) / np.maximum(n_games, 1), np.nan)
+
+    def build(self, boxscores: pd.DataFrame, **kwargs):
+        """
+        Takes boxscores for season (Example: SeasonData.load()) and computes form after every game in a single sorted pass
+        Optional:
+            - save: save to filing (default: True)
+        Returns self so calls can be chained
+        """
+        logs = (boxscores
+                [['date', 'name', *self.stats]]
+                .assign(date=lambda df_: pd.to_datetime(df_.date))
+                .sort_values(['name', 'date'], kind='stable')
+                .reset_index(drop=True)
+               )
+
+        # Index of each player's first game, every row can then find its window without grouping
+        game_number = logs.groupby('name').cumcount().to_numpy()
+        starts = np.arange(len(logs)) - game_number
+
+        values = logs[self.stats].to_numpy(dtype=np.float64)
+
+        windows = {
+            f'last-{window}' if window is not None else 'season': self.window_means(values, starts, window)
+            for window in [*self.windows, None]
+        }
+
+        self.form = (pd
+                     .concat([
+                         logs[['date', 'name']],
+                         pd.Series(game_number + 1, name='n-games'),
+                         *[
+                             pd.DataFrame(means, columns=[f'{stat}-{label}' for stat in self.stats])
+                             for label, means in windows.items()
+                         ]
+                     ], axis=1)
+                     .round(3)
+                    )
+
+        if kwargs.get('save', True):
+            self.filing.save('features', self.form, site=self.site, table='form')
+
+        return self
+
+    def lookup(self, names: Sequence[str], date: str, columns: Sequence[str]|None = None, **kwargs) -> pd.DataFrame:
+        """
+        Returns form of every player in names going into date (only games before date), indexed by name
+        Players without a game before date filled with fill_value
+        Optional:
+            - fill_value: default 0.0
+        Example:
+            - lookup(['Jayson Tatum'], '2024-01-15', ['fpts-last-5', 'fpts-season'])
+        """
+        columns = list(columns) if columns is not None else [col for col in self.form.columns if col not in ('date', 'name')]
+
+        before = self.form.loc[(self.form['date'] < pd.Timestamp(date)) & self.form['name'].isin(names)]
+
+        return (before
+                .drop_duplicates('name', keep='last')
+                .set_index('name')
+                .reindex(index=names, columns=columns)
+                .fillna(kwargs.get('fill_value', 0.0))
+               )
+
+    def on(self, slates: pd.DataFrame, columns: Sequence[str]|None = None) -> pd.DataFrame:
+        """
+        Takes dataframe with date and name columns (Example: every player on every backtest slate)
+        Returns it with form going into each date added, all dates in one merge_asof
+        """
+        columns = list(columns) if columns is not None else [col for col in self.form.columns if col not in ('date', 'name')]
+
+        # Index moved to columns (name is usually the index) and row number kept to put rows back in original order
+        index_columns = [name if name is not None else 'index' for name in slates.index.names]
+        rows = slates.reset_index().assign(date=lambda df_: pd.to_datetime(df_.date), row_=np.arange(len(slates)))
+
+        return (pd
+                .merge_asof(
+                    rows.sort_values('date'),
+                    self.form[['date', 'name', *columns]].sort_values('date'),
+                    on='date',
+                    by='name',
+                    allow_exact_matches=False
+                )
+                .sort_values('row_')
+                .drop(['row_', *index_columns], axis=1)
+                .set_axis(slates.index)
+                .assign(date=slates['date'].to_numpy())
+               )
@@ -0,0 +1,150 @@
+import pandas as pd
+
+from collections.abc import Sequence
+
+from stats import describe
+
+
+class FeatureStore:
+
+    # Stats kept for every player, usg as fraction so products are on same scale as ts
+    STATS = ('mp', 'fpts', 'fppm', 'usg', 'ts', 'mp*usg', 'mp*usg*ts')
+
+    # Quantiles kept for every stat, named as in stats.QUANTILE_LABELS
+    QUANTILES = ('floor', 'median', 'ceiling')
+
+    def __init__(self, filing, **kwargs) -> None:
+        """
+        Per-player floor/median/ceiling of stats, kept up to date as new boxscores come in instead of recomputed every load
+        Game logs and features are saved with filing so nothing is recomputed between sessions
+        Optional:
+            - site: site fpts are for (default: filing.site)
+            - window: only use each player's last n games (default: None, whole season)
+            - stats: extra stats to include on top of STATS, have to be columns of boxscores given to update()
+        Example:
+            - store = FeatureStore(Filing('2023-2024'), site='draftkings').update(SeasonData(year=2023).load())
+            - store.lookup(contest_df.index, ['fpts', 'mp'])
+        """
+        self.filing = filing
+        self.site = kwargs.get('site', filing.site)
+        self.window = kwargs.get('window', None)
+        self.stats = sum([list(self.STATS), [stat for stat in kwargs.get('stats', list()) if stat not in self.STATS]], list())
+
+        self.table = 'season' if self.window is None else f'last-{self.window}'
+
+        # Game logs of every player (only stat columns) and current features, empty until first update
+        self.logs = self.load('logs')
+        self.features = self.load(self.table)
+
+        return None
+
+    def load(self, table: str) -> pd.DataFrame:
+        if self.filing.exists('features', site=self.site, table=table):
+            return self.filing.load('features', site=self.site, table=table)
+
+        return pd.DataFrame()
+
+    def save(self) -> None:
+        self.filing.save('features', self.logs, site=self.site, table='logs')
+        self.filing.save('features', self.features, site=self.site, table=self.table)
+
+    @property
+    def last_date(self) -> str|None:
+        """
+        Most recent date included in store
+        """
+        return None if self.logs.empty else self.logs['date'].max()
+
+    @classmethod
+    def derive(cls, boxscores: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds product stats to boxscores (from SeasonData.load), usg converted from percent
+        """
+        return (boxscores
+                .assign(
+                    usg=lambda df_: df_.usg / 100,
+                    mp_usg=lambda df_: df_.mp * df_.usg,
+                    mp_usg_ts=lambda df_: df_.mp_usg * df_.ts,
+                )
+                .rename({'mp_usg': 'mp*usg', 'mp_usg_ts': 'mp*usg*ts'}, axis=1)
+               )
+
+    def update(self, boxscores: pd.DataFrame, **kwargs):
+        """
+        Takes boxscores (whole season or just new dates) and adds any (date, name) rows not in store yet, late boxscores for dates already stored too
+        Only players with new rows have features recomputed, everyone else is left as is
+        Optional:
+            - rebuild: recompute every player from boxscores given, ignoring what's stored (default: False)
+            - save: save logs and features to disk (default: True)
+        Returns self so calls can be chained
+        """
+        boxscores = self.derive(boxscores)[['date', 'name', *self.stats]].drop_duplicates(['date', 'name'])
+
+        if kwargs.get('rebuild', False) or self.logs.empty or any(stat not in self.logs.columns for stat in self.stats):
+            self.logs = boxscores
+            self.features = pd.DataFrame()
+        else:
+            stored = pd.MultiIndex.from_frame(self.logs[['date', 'name']])
+            self.logs = pd.concat([self.logs, boxscores.loc[~pd.MultiIndex.from_frame(boxscores[['date', 'name']]).isin(stored)]], ignore_index=True)
+
+        # Logs are shared by every window, so players with rows new to these features are found from number of rows features were computed from
+        n_logs = self.logs.groupby('name').size()
+        if self.features.empty or 'n-logs' not in self.features.columns:
+            stale = n_logs.index
+        else:
+            stale = n_logs.index[(n_logs != self.features['n-logs'].reindex(n_logs.index)).to_numpy()]
+
+        if stale.empty:
+            return self
+
+        updated = self.compute(self.logs.loc[self.logs['name'].isin(stale)])
+
+        self.features = (pd
+                         .concat([None if self.features.empty else self.features.loc[~self.features.index.isin(updated.index)], updated])
+                         .sort_values(['mp*usg-median', 'fppm-median', 'usg-median'], ascending=False)
+                        )
+
+        if kwargs.get('save', True):
+            self.save()
+
+        return self
+
+    def compute(self, logs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Takes game logs and returns features for every player in them
+        All quantiles of all stats for all players come from one stats.describe call, NaN stats skipped
+        Only games with minutes played count (DNPs have NaN mp), so they don't take up games of window
+        Layout: n-games, last-date, n-logs (rows in logs, DNPs too, for update), then {stat}-floor, {stat}-median, {stat}-ceiling for every stat
+        """
+        n_logs = logs.groupby('name').size().rename('n-logs')
+        logs = logs.loc[logs['mp'].notna()].sort_values(['name', 'date'])
+
+        if self.window is not None:
+            logs = logs.groupby('name').tail(self.window)
+
+        quantiles = describe(logs, 'name', self.stats, list(self.QUANTILES), skipna=True)
+        quantiles.columns = ['-'.join(col) for col in quantiles.columns]
+
+        return (pd
+                .concat([
+                    logs.groupby('name')['date'].agg(['count', 'max']).set_axis(['n-games', 'last-date'], axis=1),
+                    n_logs,
+                    quantiles
+                ], axis=1)
+                .round(3)
+               )
+
+    def lookup(self, names: Sequence[str], columns: Sequence[str] = ('fpts', 'mp'), **kwargs) -> pd.DataFrame:
+        """
+        Returns features for names in one reindex, players without any games filled with fill_value
+        Columns given as stat (Example: 'fpts' -> 'fpts-median') or full feature name (Example: 'fpts-ceiling')
+        Optional:
+            - fill_value: value for players not in store (default: 0.0)
+        """
+        features = [col if col in self.features.columns else f'{col}-median' for col in columns]
+
+        return (self.features
+                .reindex(index=names, columns=features)
+                .fillna(kwargs.get('fill_value', 0.0))
+                .set_axis(list(columns), axis=1)
+               )
@@ -0,0 +1,163 @@
+# Registry of datasets Filing knows how to save and load
+# Each dataset has:
+#   - path: directories relative to season directory, formatted with keys (site, mode, date, etc.)
+#   - file: filename (without extension) formatted with keys
+#   - format: how dataset is stored on disk, see FORMATS for extensions
+#   - schema: dtypes enforced on save and on load, columns not in schema are left alone
+#   - objects: dtype for any remaining string columns not in schema (None to leave as is)
+
+FORMATS = {
+    # Binary, keeps dtypes (categoricals, ints) exactly as saved -> fastest to reload
+    'pickle': 'pkl',
+    # Only for files that need to be uploaded to sites
+    'csv': 'csv',
+    # Directory of .npy arrays written by LineupPool.save, memory mapped on load
+    'pool': 'pool',
+}
+
+DATASETS = {
+    # Standardized contest files, one per slate
+    'contests': {
+        'path': ('contest-files', '{site}', '{mode}'),
+        'file': '{date}',
+        'format': 'pickle',
+        'schema': {
+            'name': 'string',
+            'id': 'string',
+            'pos': 'category',
+            'salary': 'int32',
+            'team': 'category',
+            'opp': 'category',
+            'injury': 'category',
+        },
+        'objects': 'category',
+    },
+
+    # One row per contest file recorded at ingest (date, main/late, n_games, teams, n_players), so slates can be picked without reading any csv
+    'catalog': {
+        'path': ('contest-files', '{site}'),
+        'file': 'catalog',
+        'format': 'pickle',
+        'schema': {
+            'site': 'category',
+            'date': 'string',
+            'slate': 'category',
+            'n_games': 'uint8',
+            'n_teams': 'uint8',
+            'n_players': 'uint16',
+            'file': 'string',
+            'mtime': 'float64',
+        },
+        'objects': None,
+    },
+
+    # Projections for current slate
+    'projections': {
+        'path': ('contest-files', '{site}', 'current'),
+        'file': 'projections',
+        'format': 'pickle',
+        'schema': {
+            'name': 'string',
+            'fpts': 'float32',
+            'e_fpts': 'float32',
+            'fpts/$': 'float32',
+            'e_fpts/$': 'float32',
+            'value': 'float32',
+        },
+        'objects': None,
+    },
+
+    # Lineups with player IDs to upload to site, has to stay csv
+    'ids': {
+        'path': ('contest-files', '{site}', 'current'),
+        'file': 'IDs',
+        'format': 'csv',
+        'schema': dict(),
+        'objects': None,
+    },
+
+    # Optimal lineups from backtesting, one file per slate size
+    'optimals': {
+        'path': ('optimals', '{site}'),
+        'file': '{n_games}-games',
+        'format': 'pickle',
+        'schema': {
+            'date': 'category',
+            'salary': 'int32',
+            'fpts': 'float32',
+            'n_teams': 'uint8',
+            'n_starters': 'uint8',
+            'n_games': 'uint8',
+            'C-salary': 'int32',
+        },
+        'objects': 'category',
+    },
+
+    # Player game logs and floor/median/ceiling features kept by features.FeatureStore
+    'features': {
+        'path': ('features', '{site}'),
+        'file': '{table}',
+        'format': 'pickle',
+        'schema': dict(),
+        'objects': None,
+    },
+
+    # Cached optimals for a single slate, file named by hash of everything that went into creating them (see backtest.BacktestCache)
+    'backtests': {
+        'path': ('backtests', '{site}'),
+        'file': '{key}',
+        'format': 'pickle',
+        'schema': dict(),
+        'objects': None,
+    },
+
+    # Lineups created by engines, player columns stored as categoricals
+    'lineups': {
+        'path': ('lineups', '{site}'),
+        'file': '{date}',
+        'format': 'pickle',
+        'schema': {
+            'salary': 'int32',
+            'fpts': 'float32',
+        },
+        'objects': 'category',
+    },
+
+    # Full lineup pools (LineupPool) for a slate so they never need to be regenerated
+    'pools': {
+        'path': ('lineups', '{site}'),
+        'file': '{date}',
+        'format': 'pool',
+        'schema': dict(),
+        'objects': None,
+    },
+
+    # Every valid lineup of a slate, file named by hash of salaries/positions/teams and roster rules (see lineups.FeasibleCache)
+    'feasible': {
+        'path': ('feasible', '{site}'),
+        'file': '{key}',
+        'format': 'pool',
+        'schema': dict(),
+        'objects': None,
+    },
+}
+
+# Columns from raw contest files downloaded from each site
+CONTEST_COLUMNS = {
+    'draftkings': {
+        'Name': 'name',
+        'ID': 'id',
+        'Position': 'pos',
+        'Salary': 'salary',
+        'TeamAbbrev': 'team',
+    },
+    'fanduel': {
+        'Nickname': 'name',
+        'Id': 'id',
+        'Position': 'pos',
+        'Salary': 'salary',
+        'Team': 'team',
+        'Opponent': 'opp',
+        'Injury Indicator': 'injury',
+    }
+}
@@ -4,6 +4,16 @@ import datetime
 
 import pandas as pd
 
+from typing import Any
+
+from lineups import LineupPool
+
+from ._datasets import (
+    CONTEST_COLUMNS,
+    DATASETS,
+    FORMATS,
+)
+
 class Filing:
 
     def __init__(self, season: str, **kwargs):
@@ -34,12 +44,12 @@ class Filing:
 
     def save_boxscore(self, df: pd.DataFrame) -> None:
         """
-        Saves boxscore as csv (later on can configure different formats)
+        Saves boxscore as csv
         Saves in form of {date}_{team}.csv --> Will never have duplication issues
             - date will be in .isoformat() so _ better than - in order to quickly separate team from date if necessary
             - filename.split('_')[0] == date
             - filename.split('_')[1].split('.')[0] for team without ".csv"
-        TODO: Generalize -> save(self, data_category, df, **kwargs) to save things other than boxscores 
+        Everything other than boxscores goes through Filing.save(dataset, df, **keys)
         """
         
         filename = f'{df["date"].iloc[0]}_{df["team"].iloc[0]}.csv'
@@ -109,6 +119,242 @@ class Filing:
         Purpose of this is to more quickly scrape/update data rather than start from beginning (season start date) each time
         """
         return self.sort_dates([self.extract_date_from_file(file) for file in glob.glob(self.boxscores_dir + '/*.csv')])[0]
-        
-        
-        
\ No newline at end of file
+
+# ------------------------------- Datasets -------------------------------
+# Typed save/load for everything other than raw boxscores, see _datasets.py for registry
+
+    def dataset_path(self, dataset: str, **keys) -> str:
+        """
+        Returns path to file for dataset, keys fill in directories and filename
+        Defaults:
+            - site: site from constructor
+            - mode: main-slate
+        Example:
+            - dataset_path('contests', date='2023-11-01') -> data/2023-2024/contest-files/draftkings/main-slate/2023-11-01.pkl
+        """
+        info = DATASETS[dataset]
+        keys = {'site': self.site, 'mode': 'main-slate', **keys}
+
+        directory = os.path.join(self.season_dir, *[part.format(**keys) for part in info['path']])
+        filename = f'{info["file"].format(**keys)}.{FORMATS[info["format"]]}'
+
+        return os.path.join(directory, filename)
+
+    @classmethod
+    def apply_schema(cls, dataset: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Casts columns of df to dtypes in schema of dataset
+        Any other string columns are converted to dataset's 'objects' dtype (usually category)
+        Columns in schema missing from df are ignored
+        """
+        info = DATASETS[dataset]
+
+        dtypes = {col: dtype for col, dtype in info['schema'].items() if col in df.columns}
+
+        if info['objects'] is not None:
+            for col in df.columns:
+                if col not in dtypes and df[col].dtype == 'object' and df[col].map(type).eq(str).all():
+                    dtypes[col] = info['objects']
+
+        return df.astype(dtypes)
+
+    def save(self, dataset: str, df: pd.DataFrame|LineupPool, **keys) -> str:
+        """
+        Saves df to file for dataset after enforcing schema
+        Returns path saved to
+        Example:
+            - save('projections', projections_df)
+            - save('contests', contest_df, date='2023-11-01')
+            - save('pools', engine.create_pool(), date='2023-11-01')
+        """
+        fpath = self.dataset_path(dataset, **keys)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+
+        if DATASETS[dataset]['format'] == 'pool':
+            return df.save(fpath)
+
+        df = self.apply_schema(dataset, df)
+
+        if DATASETS[dataset]['format'] == 'csv':
+            df.to_csv(fpath, index=False)
+        else:
+            df.to_pickle(fpath)
+
+        return fpath
+
+    def save_many(self, dataset: str, frames: dict[str, pd.DataFrame], key: str = 'date', **keys) -> list[str,...]:
+        """
+        Saves multiple dataframes for dataset at once, frames indexed by value of key
+        If key is part of dataset's file path, each frame gets its own file
+        Otherwise all frames are concatenated (with key as a column) and written in a single write
+        Example:
+            - save_many('optimals', {'2023-11-01': df1, '2023-11-02': df2}, key='date', n_games=2) -> single file
+            - save_many('contests', {'2023-11-01': df1, '2023-11-02': df2}, key='date') -> two files
+        """
+        info = DATASETS[dataset]
+        key_str = '{' + key + '}'
+
+        if key_str in info['file'] or any(key_str in part for part in info['path']):
+            return [self.save(dataset, df, **{key: value}, **keys) for value, df in frames.items()]
+
+        combined = pd.concat([df.assign(**{key: value}) for value, df in frames.items()])
+
+        return [self.save(dataset, combined, **keys)]
+
+    def load(self, dataset: str, **keys) -> pd.DataFrame|LineupPool:
+        """
+        Loads dataset from file with schema enforced
+        Example:
+            - load('contests', date='2023-11-01')
+            - load('optimals', n_games=2)
+            - load('pools', date='2023-11-01') -> LineupPool, memory mapped
+        """
+        fpath = self.dataset_path(dataset, **keys)
+
+        if DATASETS[dataset]['format'] == 'pool':
+            return LineupPool.load(fpath)
+
+        if DATASETS[dataset]['format'] == 'csv':
+            return self.apply_schema(dataset, pd.read_csv(fpath))
+
+        return self.apply_schema(dataset, pd.read_pickle(fpath))
+
+    def exists(self, dataset: str, **keys) -> bool:
+        """
+        Returns whether file for dataset has been saved
+        """
+        return os.path.exists(self.dataset_path(dataset, **keys))
+
+    def available(self, dataset: str, key: str = 'date', **keys) -> list[str,...]:
+        """
+        Returns all values of key that have been saved for dataset, sorted
+        Example:
+            - available('contests', key='date') -> ['2023-10-24', '2023-10-25', ...]
+        """
+        fpath = self.dataset_path(dataset, **{key: '*'}, **keys)
+        prefix, suffix = fpath.split('*')
+
+        return sorted([file[len(prefix):len(file)-len(suffix)] for file in glob.glob(fpath)])
+
+    def ingest_contest(self, file: str, **keys) -> pd.DataFrame:
+        """
+        Reads raw contest file downloaded from site and saves standardized version under contests dataset
+        Date is taken from filename if not given, so that {date}.csv and {date}-late.csv are kept separate
+        Returns standardized dataframe
+        """
+        columns = CONTEST_COLUMNS[keys.get('site', self.site)]
+
+        df = (pd
+              .read_csv(file, usecols=lambda col: col in columns)
+              .rename(columns, axis=1)
+              .assign(name=lambda df_: df_.name.map(self.clean_name))
+             )
+
+        keys = {'date': file.split('/')[-1].split('.')[0], **keys}
+        self.save('contests', df, **keys)
+        self.record_contests([self.catalog_entry(df, file, **keys)], site=keys.get('site', self.site))
+
+        return self.apply_schema('contests', df)
+
+# ------------------------------- Catalog -------------------------------
+# Summary of every contest file (size of slate, teams, etc.) recorded once, see 'catalog' in _datasets.py
+
+    def catalog_entry(self, df: pd.DataFrame, file: str, **keys) -> dict[str, Any]:
+        """
+        Takes standardized contest dataframe and file it came from, returns row for catalog
+        Late slates are any with 'late' in mode or filename (Example: 2023-11-01-late.csv)
+        """
+        teams = sorted(df['team'].astype(str).unique())
+        date = keys.get('date', file.split('/')[-1].split('.')[0])
+
+        return {
+            'site': keys.get('site', self.site),
+            'date': date.replace('-late', ''),
+            'slate': 'late' if 'late' in keys.get('mode', '') or 'late' in date else 'main',
+            'n_games': len(teams) // 2,
+            'n_teams': len(teams),
+            'teams': tuple(teams),
+            'n_players': len(df),
+            'file': os.path.abspath(file),
+            'mtime': os.path.getmtime(file),
+        }
+
+    def record_contests(self, entries: list[dict[str, Any]], **keys) -> pd.DataFrame:
+        """
+        Adds entries to catalog for site, replacing any earlier entries for the same files
+        """
+        catalog = (pd
+                   .concat([self.load_catalog(**keys), pd.DataFrame(entries)], ignore_index=True)
+                   .drop_duplicates('file', keep='last')
+                   .sort_values(['date', 'slate'])
+                   .reset_index(drop=True)
+                  )
+
+        self.save('catalog', catalog, **keys)
+
+        return self.apply_schema('catalog', catalog)
+
+    def load_catalog(self, **keys) -> pd.DataFrame:
+        """
+        Returns catalog of contest files for site (empty if nothing has been recorded yet)
+        """
+        if not self.exists('catalog', **keys):
+            return self.apply_schema('catalog', pd.DataFrame(columns=[*DATASETS['catalog']['schema'], 'teams']))
+
+        return self.load('catalog', **keys)
+
+    def catalog_contests(self, files: list[str,...], **keys) -> pd.DataFrame:
+        """
+        Records raw contest files downloaded before the catalog existed (Example: glob of contest-files/fanduel/main-slate/*.csv)
+        Files already in catalog and unchanged since are skipped, so only new files are ever read
+        Returns updated catalog
+        """
+        site = keys.get('site', self.site)
+        columns = CONTEST_COLUMNS[site]
+
+        catalog = self.load_catalog(**keys)
+        recorded = dict(zip(catalog['file'], catalog['mtime']))
+
+        entries = [
+            self.catalog_entry(
+                pd.read_csv(file, usecols=lambda col: col in columns).rename(columns, axis=1),
+                file,
+                **keys
+            )
+            for file in files
+            if recorded.get(os.path.abspath(file)) != os.path.getmtime(file)
+        ]
+
+        return self.record_contests(entries, **keys) if entries else catalog
+
+    def slates(self, **kwargs) -> pd.DataFrame:
+        """
+        Returns catalog rows for slates matching every condition given
+        Optional:
+            - site: defaults to site from constructor
+            - n_games: number of games, int or sequence of ints (Example: range(3, 6))
+            - slate: 'main' or 'late'
+            - teams: only slates with every one of these teams playing
+            - exact_teams: only slates with exactly these teams
+        Example:
+            - filing.slates(n_games=2, slate='late')['file'] -> contest files for every 2 game late slate
+        """
+        catalog = self.load_catalog(site=kwargs.get('site', self.site))
+        mask = pd.Series(True, index=catalog.index)
+
+        if 'n_games' in kwargs:
+            n_games = kwargs['n_games']
+            mask &= catalog['n_games'].isin([n_games] if isinstance(n_games, int) else list(n_games))
+
+        if 'slate' in kwargs:
+            mask &= catalog['slate'] == kwargs['slate']
+
+        if 'teams' in kwargs:
+            teams = set(kwargs['teams'])
+            mask &= catalog['teams'].map(teams.issubset)
+
+        if 'exact_teams' in kwargs:
+            exact_teams = tuple(sorted(kwargs['exact_teams']))
+            mask &= catalog['teams'].map(lambda teams: teams == exact_teams)
+
+        return catalog.loc[mask]
@@ -0,0 +1,13 @@
+from .pool import LineupPool
+from .analytics import LineupAnalytics
+from .index import PoolIndex
+from .portfolio import Portfolio
+from .feasible import FeasibleCache
+from .swap import LateSwap
+from .milp import LineupMILP
+from .dominance import Dominance
+from .stages import StageOrder
+from .preflight import Preflight
+from .constraints import Constraints
+
+version='1.0.0'
\ No newline at end of file
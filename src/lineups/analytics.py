@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from typing import Any
+
+
+class LineupAnalytics:
+
+    def __init__(self, pool) -> None:
+        """
+        Computes attributes for every lineup in a LineupPool at once
+        Every attribute is a gather from the player table with the id matrix followed by numpy reductions
+        Gathers are cached so asking for several attributes of the same player value (teams, n_teams, distro) only gathers once
+        """
+        self.pool = pool
+
+        # Gathers already done, kept on instance (not functools.cache) so they are freed with the instance
+        self.gathered = dict()
+
+        self.ATTRIBUTES = {
+            'n_teams': (self.n_unique, 'team'),
+            'n_games': (self.n_unique, 'game'),
+            'n_starters': (self.total, 'starter'),
+            'teams': (self.joined, 'team', '-'),
+            'games': (self.joined, 'game', ':'),
+            'distro': (self.distro, 'team'),
+            'game-distro': (self.distro, 'game'),
+            'salaries': (self.sorted_values, 'salary'),
+            'minutes': (self.sorted_values, 'mp'),
+            'min_salary': (self.minimum, 'salary'),
+            'max_salary': (self.maximum, 'salary'),
+        }
+
+    def gather(self, kind: str, value: str) -> Any:
+        """
+        Returns pool.values/codes/counts for value, only computed first time
+        """
+        if (kind, value) not in self.gathered:
+            self.gathered[(kind, value)] = getattr(self.pool, kind)(value)
+
+        return self.gathered[(kind, value)]
+
+    def values(self, value: str) -> np.ndarray:
+        return self.gather('values', value)
+
+    def codes(self, value: str) -> tuple[np.ndarray, pd.Index]:
+        return self.gather('codes', value)
+
+    def counts(self, value: str) -> np.ndarray:
+        return self.gather('counts', value)
+
+    @classmethod
+    def row_keys(cls, rows: np.ndarray) -> np.ndarray|None:
+        """
+        Packs every row into a single int64 (mixed radix over codes of each column) so finding unique rows is 1d
+        Returns None if there are too many possible rows to fit in int64
+        """
+        keys = np.zeros(rows.shape[0], dtype=np.int64)
+        capacity = 1
+
+        for j in range(rows.shape[1]):
+            codes, uniques = pd.factorize(rows[:, j])
+            capacity *= max(len(uniques), 1)
+
+            if capacity >= np.iinfo(np.int64).max:
+                return None
+
+            keys = keys * max(len(uniques), 1) + codes
+
+        return keys
+
+    @classmethod
+    def labels(cls, rows: np.ndarray, label) -> pd.Categorical:
+        """
+        Takes matrix with one row per lineup and function to create label from a row
+        Label is only created once for each unique row, then broadcast back to every lineup as categorical
+        """
+        keys = cls.row_keys(rows)
+
+        if keys is None:
+            unique_rows, inverse = np.unique(rows, axis=0, return_inverse=True)
+        else:
+            inverse, uniques = pd.factorize(keys)
+
+            # First lineup with each unique row, assigning in reverse so earliest index is what's left
+            first = np.empty(len(uniques), dtype=np.int64)
+            first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+            unique_rows = rows[first]
+
+        categories = pd.Index([label(row) for row in unique_rows], dtype=object, tupleize_cols=False)
+
+        return pd.Categorical.from_codes(inverse.reshape(-1), categories=categories)
+
+# ------------------------------- Attributes -------------------------------
+
+    def n_unique(self, value: str) -> np.ndarray:
+        """
+        Number of different values in every lineup (Example: n_unique('team') -> number of teams)
+        """
+        return (self.counts(value) > 0).sum(axis=1).astype(np.uint8)
+
+    def total(self, value: str) -> np.ndarray:
+        return self.values(value).sum(axis=1)
+
+    def minimum(self, value: str) -> np.ndarray:
+        return self.values(value).min(axis=1)
+
+    def maximum(self, value: str) -> np.ndarray:
+        return self.values(value).max(axis=1)
+
+    def joined(self, value: str, sep: str) -> pd.Categorical:
+        """
+        Values of every player in lineup, sorted, joined into single string
+        Sorted so same values always give same string (create_optimal joined them in set order of names, which changes between sessions)
+        Example:
+            - joined('team', '-') -> 'ATL-ATL-BOS-DEN-DEN-MIA-NY-NY'
+        """
+        codes, uniques = self.codes(value)
+
+        # Convert codes to alphabetical ranks so sorting each row sorts values alphabetically
+        order = np.argsort(uniques.astype(str))
+        ranks = np.empty(len(order), dtype=np.int16)
+        ranks[order] = np.arange(len(order))
+
+        return self.labels(np.sort(ranks[codes], axis=1), lambda row: sep.join([str(uniques[order[rank]]) for rank in row]))
+
+    def distro(self, value: str) -> pd.Categorical:
+        """
+        Distribution of players among values, smallest to largest, as tuple (same as create_optimal's distro, Example: lineups['distro'] == (1,1,2,2,3))
+        Example:
+            - Lineup teams: [atl, bkn, atl, cha, den, hou, no, dal, atl] -> (1, 1, 1, 1, 1, 1, 3)
+        """
+        # Largest counts first, never more values than slots
+        counts = np.sort(self.counts(value), axis=1)[:, ::-1][:, :len(self.pool.slots)]
+
+        return self.labels(counts, lambda row: tuple(sorted(row[row > 0].tolist())))
+
+    def sorted_values(self, value: str) -> pd.Categorical:
+        """
+        Tuple of values of every player in lineup, sorted
+        Categorical of tuples so any .map() afterwards runs once per unique tuple instead of once per lineup
+        Example:
+            - sorted_values('salary') -> (3_000, 3_500, 4_800, 5_000, 6_100, 7_400, 9_000, 10_200)
+        """
+        return self.labels(np.sort(self.values(value), axis=1), lambda row: tuple(row.tolist()))
+
+    def slot_value(self, slot: str, value: str) -> np.ndarray:
+        """
+        Value of player in specific slot (Example: slot_value('C', 'salary') -> salary of center)
+        """
+        return self.values(value)[:, self.pool.slots.index(slot)]
+
+    def attribute(self, attr: str) -> Any:
+        """
+        Returns array/categorical for attribute, see self.ATTRIBUTES for options
+        Also takes {slot}-{value} for value of player in a slot (Example: 'C-salary')
+        """
+        if attr in self.ATTRIBUTES:
+            function, *args = self.ATTRIBUTES[attr]
+            return function(*args)
+
+        slot, value = attr.split('-', 1)
+        if slot not in self.pool.slots:
+            raise KeyError(f'Unknown lineup attribute: {attr}')
+
+        return self.slot_value(slot, value)
+
+    def annotate(self, *attrs) -> dict[str, Any]:
+        """
+        Returns dictionary of {attribute: values for every lineup} for all attrs, ready for DataFrame.assign(**)
+        """
+        return {attr: self.attribute(attr) for attr in attrs}
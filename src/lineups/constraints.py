@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+
+class Constraints:
+
+    def __init__(self, players: pd.DataFrame, **kwargs) -> None:
+        """
+        User constraints on which players a lineup has, compiled to counts: (names, min, max) -> between min and max of names in every lineup
+        Engines hand counts to lineups.StageOrder, so they are enforced while lineups are filled instead of filtering the full pool after:
+            - candidates with more of a group than its max are dropped before the first stage (excludes, bans inside a FanDuel position pair)
+            - partial lineups over a max, or that can't reach a min with units left, are dropped as soon as that is known and before checker runs on them
+        Parameters:
+            - players: player table indexed by name, needs team column (and opp for bring_backs, game for game_stacks)
+        Optional (same names as PoolIndex.query where they overlap):
+            - include: players every lineup has (locks)
+            - exclude: players no lineup has
+            - at_least: (players, k) or list of them, at least k of players
+            - at_most: (players, k) or list of them, at most k of players
+            - groups: list of (players, min, max) (Example: (['Jayson Tatum', 'Jaylen Brown'], 1, 1) -> exactly one of them)
+            - stacks: {team: k} at least k players from team
+            - game_stacks: {game: k} at least k players from game
+            - bring_backs: {team: k} at least k players from team's opponent (Example: stacks={'BOS': 3}, bring_backs={'BOS': 1})
+            - bans: pairs of players never in a lineup together (like FanDuel checker's bad_teammates, but for both sites and PAST too)
+        Example:
+            - Constraints(contest_df, include=['Jayson Tatum'], stacks={'BOS': 3}, bring_backs={'BOS': 1}).counts
+        """
+        self.players = players
+
+        missing = [name for name in kwargs.get('include', list()) if name not in players.index]
+        if missing:
+            raise KeyError(f'Players to include missing from player table: {missing}')
+
+        at_least = kwargs.get('at_least', list())
+        at_most = kwargs.get('at_most', list())
+
+        counts = sum([
+            [((name,), 1, 1) for name in kwargs.get('include', list())],
+            [((name,), 0, 0) for name in kwargs.get('exclude', list())],
+            [(names, k, len(names)) for names, k in ([at_least] if isinstance(at_least, tuple) else at_least)],
+            [(names, 0, k) for names, k in ([at_most] if isinstance(at_most, tuple) else at_most)],
+            [(names, lo, hi) for names, lo, hi in kwargs.get('groups', list())],
+            [(self.where('team', team), k, np.iinfo(np.int64).max) for team, k in kwargs.get('stacks', dict()).items()],
+            [(self.where('game', game), k, np.iinfo(np.int64).max) for game, k in kwargs.get('game_stacks', dict()).items()],
+            [(self.opponents(team), k, np.iinfo(np.int64).max) for team, k in kwargs.get('bring_backs', dict()).items()],
+            [(tuple(duo), 0, 1) for duo in kwargs.get('bans', list())],
+        ], list())
+
+        # Only players in pool, max never more than number of them
+        self.counts = list()
+        for names, lo, hi in counts:
+            names = tuple([name for name in names if name in players.index])
+            self.counts.append((names, lo, min(hi, len(names))))
+
+        return None
+
+    def where(self, value: str, key: str) -> tuple[str,...]:
+        """
+        Names of players whose value column is key (Example: where('team', 'BOS'))
+        """
+        if value not in self.players.columns:
+            raise ValueError(f'Player table has no {value} column')
+
+        return tuple(self.players.loc[self.players[value] == key].index)
+
+    def opponents(self, team: str) -> tuple[str,...]:
+        """
+        Names of players on team's opponent, from opp column
+        """
+        if 'opp' not in self.players.columns:
+            raise ValueError('Player table has no opp column, needed for bring_backs')
+
+        return self.where('team', self.players.loc[self.players['team'] == team, 'opp'].iloc[0])
+
+    def names(self) -> set[str]:
+        """
+        Every player in a count, swapping any of them for another player can break a constraint
+        """
+        return set([name for names, _, _ in self.counts for name in names])
+
+    def check(self, names: Sequence[str]) -> bool:
+        """
+        Full lineup follows every constraint
+        """
+        names = set(names)
+
+        return all([lo <= len(names.intersection(group)) <= hi for group, lo, hi in self.counts])
+
+    def rules(self) -> list[tuple[list[str], int, int]]:
+        """
+        Counts in a stable form, for FeasibleCache rules (constrained pools are saved apart from full pool)
+        """
+        return sorted([(sorted(names), int(lo), int(hi)) for names, lo, hi in self.counts])
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+
+class Dominance:
+
+    def __init__(self, players: pd.DataFrame, slots: Sequence[str], eligible: dict[str, tuple[str,...]], **kwargs) -> None:
+        """
+        Drops players that can never be in the best top_n lineups, before anything is enumerated
+        Player q dominates p in a slot when q can fill that slot too, has at least as many fpts and salary close enough to p's (below)
+        Same fpts is broken by order in players, so two identical players never drop each other
+        p is dropped when, for every slot it can fill, it has at least top_n + number of slots dominators that can swap in:
+            - any lineup with p has at most (slots - 1) of them already, swapping p for each of the rest gives top_n+1 different lineups at least as good
+            - position eligibility of dominators only has to cover slot p is in, not every slot p can fill
+            - so a lineup with p is never needed to make the top_n (same fpts for top_n lineups with or without p)
+        Swaps have to keep lineup valid, so only dominators that always can are counted:
+            - salary: lineup with salary S can swap p for anyone from (S - floor) cheaper to (cap - S) more expensive,
+              so with a salary floor there have to be enough dominators in every window of (cap - floor) around p's salary (salaries are in 100s)
+              without a floor only cheaper (or same) salary counts
+            - team_max: dominators from the (slots - 1) // team_max other teams with the most of them don't count (those teams might be full)
+            - fixed_salary: slots in partial lineups checker bounds by cost (and min cost), which players share a partial lineup with p depends on how it was filled,
+              so any salary change can break a bound and only dominators with p's exact salary count
+            - same_team: rules on teams in partial lineups (DraftKings n_teams, FanDuel distros) hold after swap only for teammates
+        Parameters:
+            - players: player table indexed by name, needs pos, salary, team and fpts columns
+            - slots: slot labels in lineup order
+            - eligible: {slot: positions that can fill it} (Example: {'G': ('PG', 'SG'), ...})
+        Optional:
+            - top_n: number of lineups that have to stay exact (default: 1)
+            - salary: (floor, cap) (default: (0, 50_000), no floor)
+            - team_max: max players from a team (default: None, no limit)
+            - same_team: only teammates count as dominators, for rules on teams/games in a lineup (default: False)
+            - fixed_salary: slots where only dominators with same salary count (see above) (default: none)
+            - restrict: {slot: boolean array over players} of who can fill slot on top of eligible (Example: {'C': salary >= 4_800})
+            - exclude: names never counted as dominators (Example: players in bad teammate pairs)
+            - keep: names never dropped (Example: players in user constraints, see lineups.Constraints)
+        Example:
+            - Dominance(contest_df, engine.labels, engine.eligible, top_n=150, salary=(49_500, 50_000)).prune()
+        """
+        self.players = players
+        self.slots = list(slots)
+        self.top_n = kwargs.get('top_n', 1)
+        self.salary_floor, self.salary_cap = kwargs.get('salary', (0, 50_000))
+        self.team_max = kwargs.get('team_max')
+        self.same_team = kwargs.get('same_team', False)
+        self.fixed_salary = set(kwargs.get('fixed_salary', list()))
+        self.exclude = set(kwargs.get('exclude', list()))
+        self.keep = set(kwargs.get('keep', list()))
+
+        # fits[p, j] -> player p can fill slot j
+        self.fits = np.column_stack([
+            players['pos'].map(lambda pos_: any([pos in pos_ for pos in eligible[slot]])).to_numpy(dtype=bool)
+            for slot in self.slots
+        ])
+
+        for slot, allowed in kwargs.get('restrict', dict()).items():
+            self.fits[:, self.slots.index(slot)] &= np.asarray(allowed, dtype=bool)
+
+        # Players removed by prune() with why: [pos, salary, team, fpts, dominators]
+        self.removed = pd.DataFrame()
+
+        return None
+
+    def ahead(self) -> np.ndarray:
+        """
+        Matrix of shape (n_players, n_players), [q, p] -> q has more fpts than p
+        Same fpts goes to whoever is first in players, so it is a strict order and two players can never both be dropped because of each other
+        """
+        fpts = self.players['fpts'].to_numpy()
+        order = np.arange(len(self.players))
+
+        return (fpts[:, None] > fpts[None, :]) | ((fpts[:, None] == fpts[None, :]) & (order[:, None] < order[None, :]))
+
+    def counts(self) -> pd.Series:
+        """
+        Number of dominators of each player that can always be swapped in (see __init__), indexed by name
+        Fewest over every slot player can fill and every salary window
+        """
+        salary = self.players['salary'].to_numpy()
+        teams = pd.factorize(self.players['team'])[0]
+        # onehot[t, q] -> q plays for team t
+        onehot = (teams[None, :] == np.arange(teams.max() + 1)[:, None]).astype(np.int64)
+
+        candidates = self.ahead() & ~self.players.index.isin(list(self.exclude))[:, None]
+
+        if self.same_team:
+            candidates &= teams[:, None] == teams[None, :]
+
+        # Salary difference of q from p
+        diff = salary[:, None] - salary[None, :]
+
+        if self.salary_floor > 0:
+            width = self.salary_cap - self.salary_floor
+            windows = [(diff >= -below) & (diff <= width - below) for below in range(0, width + 1, 100)]
+        else:
+            windows = [diff <= 0]
+
+        # Players with no slot never fit in a lineup, any dominator at all is enough
+        counts = np.full(len(self.players), np.iinfo(np.int64).max)
+
+        for j, slot in enumerate(self.slots):
+            fits = self.fits[:, j]
+
+            for window in ([diff == 0] if slot in self.fixed_salary else windows):
+                doms = (candidates & window & fits[:, None]).astype(np.int64)
+                n_doms = doms.sum(axis=0)
+
+                # Worst case: lineup already has team_max from the other teams with most dominators
+                if self.team_max is not None and not self.same_team:
+                    per_team = onehot @ doms
+                    per_team[teams, np.arange(len(teams))] = 0
+                    n_doms = n_doms - (-np.sort(-per_team, axis=0)[:(len(self.slots) - 1) // self.team_max]).sum(axis=0)
+
+                counts = np.where(fits, np.minimum(counts, n_doms), counts)
+
+        counts = np.where(self.fits.any(axis=1), counts, len(self.players))
+
+        return pd.Series(counts, index=self.players.index, name='dominators')
+
+    def prune(self) -> pd.DataFrame:
+        """
+        Returns players without any that can't be in the top_n lineups, removed players (and why) kept in self.removed
+        """
+        counts = self.counts()
+        drop = (counts >= self.top_n + len(self.slots)) & ~self.players.index.isin(list(self.keep))
+
+        self.removed = (self.players
+                        .loc[drop.to_numpy(), ['pos', 'salary', 'team', 'fpts']]
+                        .assign(dominators=counts[drop])
+                        .sort_values('fpts', ascending=False)
+                       )
+
+        return self.players.loc[~drop.to_numpy()]
@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+from .pool import LineupPool
+
+
+class FeasibleCache:
+
+    # Player columns roster rules can look at, anything else (fpts, e_fpts, ...) can change without changing which lineups are valid
+    RULE_COLUMNS = ('pos', 'salary', 'team', 'opp', 'game')
+    # Modules of this package engines fill lineups with, part of engine rules like engine source
+    GENERATION = ('stages.py', 'constraints.py')
+
+    def __init__(self, filing, site: str, **kwargs) -> None:
+        """
+        Saves every valid lineup of a slate as an id matrix so changing projections never regenerates lineups
+        Salary, position, duplicate and team rules don't depend on fpts, so a slate only needs to be regenerated if:
+            - names, positions, salaries, teams or opponents change
+            - roster rules change (rules config or engine source)
+        Otherwise saved ids are rescored with the new player table in one gather per total
+        Player table is saved with pool, so rows can be in any order (Example: contest_df sorted by value after projections change)
+        Optional:
+            - rules: dictionary describing roster rules (past flag, bad teammates, source hash of engine, etc.)
+        """
+        self.filing = filing
+        self.site = site
+        self.rules = hashlib.sha256(json.dumps(kwargs.get('rules', dict()), sort_keys=True, default=str).encode()).hexdigest()
+
+        return None
+
+    @classmethod
+    def source_hash(cls, directory: str, **kwargs) -> str:
+        """
+        Hash of every source file in directory (Example: engine package), so editing a checker invalidates what it created
+        Optional:
+            - files: only these files of directory (default: every .py file)
+        """
+        digest = hashlib.sha256()
+        files = kwargs.get('files')
+
+        for file in sorted(os.listdir(directory)):
+            if file.endswith('.py') and (files is None or file in files):
+                with open(os.path.join(directory, file), 'rb') as source:
+                    digest.update(file.encode())
+                    digest.update(source.read())
+
+        return digest.hexdigest()
+
+    @classmethod
+    def generation_hash(cls) -> str:
+        """
+        Hash of modules in this package that fill lineups for engines (StageOrder, Constraints), so editing them regenerates saved lineups too
+        """
+        return cls.source_hash(os.path.dirname(__file__), files=cls.GENERATION)
+
+    def key(self, data: pd.DataFrame) -> str:
+        """
+        Key for slate with player table data, only index (names) and rule columns are hashed
+        Rows are sorted by name first, so same players in another order have same key
+        """
+        rule_data = data[[col for col in self.RULE_COLUMNS if col in data.columns]].sort_index()
+
+        digest = hashlib.sha256(self.rules.encode())
+        digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in rule_data.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(rule_data, index=True).to_numpy().tobytes())
+
+        return digest.hexdigest()[:32]
+
+    def __contains__(self, data: pd.DataFrame) -> bool:
+        return self.filing.exists('feasible', site=self.site, key=self.key(data))
+
+    def get(self, data: pd.DataFrame, **kwargs) -> LineupPool|None:
+        """
+        Returns saved lineups for slate rescored with data, None if slate hasn't been created with same rules
+        Ids always point into data: saved player table has names ids pointed to when saved, remapped if rows are in another order now
+        Optional:
+            - sum_cols: columns of data to total for every lineup
+        """
+        if data not in self:
+            return None
+
+        pool = self.filing.load('feasible', site=self.site, key=self.key(data))
+
+        if not pool.players.index.equals(data.index):
+            return pool.remap(data, **kwargs)
+
+        return pool.rescore(data, **kwargs)
+
+    def put(self, data: pd.DataFrame, pool: LineupPool) -> str:
+        """
+        Saves lineups of pool for slate, returns path
+        """
+        return self.filing.save('feasible', pool, site=self.site, key=self.key(data))
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+
+class PoolIndex:
+
+    def __init__(self, pool) -> None:
+        """
+        Inverted index over a LineupPool: for every player, which lineups they are in
+        Stored as packed bitmaps (np.packbits, 1 bit per lineup) so combining players is a bitwise AND/OR over bytes
+        Stack bitmaps (lineups with at least k players from a team/game) are built the first time they are asked for
+        Example:
+            - 1M lineups, 60 players -> 60 bitmaps of 125KB each
+        """
+        self.pool = pool
+        self.n = len(pool)
+        self.n_players = len(pool.players)
+
+        # {value: (counts matrix, uniques)} and {(value, key, k): bitmap}, filled as stacks are queried
+        self.value_counts = dict()
+        self.stack_bits = dict()
+
+        # Membership built with one assignment per slot rather than one comparison per player
+        member = np.zeros((self.n_players, self.n), dtype=bool)
+        for j in range(pool.ids.shape[1]):
+            member[pool.ids[:, j], np.arange(self.n)] = True
+
+        self.player_bits = np.packbits(member, axis=1)
+
+        return None
+
+# ------------------------------- Bitmaps -------------------------------
+
+    def all(self) -> np.ndarray:
+        """
+        Bitmap with every lineup set, padding bits at end left unset
+        """
+        return np.packbits(np.ones(self.n, dtype=bool))
+
+    def none(self) -> np.ndarray:
+        return np.zeros_like(self.all())
+
+    def player_id(self, name: str) -> int:
+        return self.pool.players.index.get_loc(name)
+
+    def player(self, name: str) -> np.ndarray:
+        """
+        Bitmap of lineups with player
+        """
+        return self.player_bits[self.player_id(name)]
+
+    def lineups(self, bits: np.ndarray) -> np.ndarray:
+        """
+        Returns positions of lineups set in bitmap (inverted list), in pool order
+        """
+        return np.flatnonzero(np.unpackbits(bits, count=self.n))
+
+    def count(self, bits: np.ndarray) -> int:
+        return int(np.unpackbits(bits, count=self.n).sum())
+
+    def first(self, bits: np.ndarray) -> int|None:
+        """
+        Returns position of first lineup set in bitmap, None if empty
+        With pool sorted by fpts this is the best lineup in bitmap
+        """
+        nonzero = np.flatnonzero(bits)
+
+        if not len(nonzero):
+            return None
+
+        byte = nonzero[0]
+        return int(byte * 8 + np.argmax(np.unpackbits(bits[byte:byte+1])))
+
+    def mask(self, bits: np.ndarray) -> np.ndarray:
+        """
+        Returns boolean array with one value per lineup
+        """
+        return np.unpackbits(bits, count=self.n).astype(bool)
+
+    def stack(self, key: str, k: int, value: str = 'team') -> np.ndarray:
+        """
+        Bitmap of lineups with at least k players where player value is key
+        Example:
+            - stack('BOS', 3) -> lineups with 3+ Celtics
+            - stack('BOS-NY', 5, 'game') -> lineups with 5+ players from game
+        """
+        if (value, key, k) not in self.stack_bits:
+            if value not in self.value_counts:
+                self.value_counts[value] = (self.pool.counts(value), self.pool.codes(value)[1])
+
+            counts, uniques = self.value_counts[value]
+            self.stack_bits[(value, key, k)] = np.packbits(counts[:, uniques.get_loc(key)] >= k)
+
+        return self.stack_bits[(value, key, k)]
+
+    def exposures(self, positions: np.ndarray) -> pd.Series:
+        """
+        Returns percentage of lineups at positions each player is in, sorted
+        """
+        counts = np.bincount(self.pool.ids[positions].ravel(), minlength=self.n_players)
+        exposure = pd.Series(100 * counts / max(len(positions), 1), index=self.pool.players.index)
+
+        return exposure.loc[exposure > 0].sort_values(ascending=False)
+
+# ------------------------------- Queries -------------------------------
+
+    def include(self, *names) -> np.ndarray:
+        """
+        Bitmap of lineups with every player in names
+        """
+        bits = self.all()
+        for name in names:
+            bits &= self.player(name)
+
+        return bits
+
+    def exclude(self, *names) -> np.ndarray:
+        """
+        Bitmap of lineups with none of the players in names
+        """
+        bits = self.all()
+        for name in names:
+            bits &= ~self.player(name)
+
+        return bits
+
+    def at_least(self, names, k: int) -> np.ndarray:
+        """
+        Bitmap of lineups with at least k of the players in names, every lineup when k <= 0
+        """
+        if k <= 0:
+            return self.all()
+
+        if k == 1:
+            bits = self.none()
+            for name in names:
+                bits |= self.player(name)
+
+            return bits
+
+        hits = sum([np.unpackbits(self.player(name), count=self.n) for name in names], np.zeros(self.n, dtype=np.uint8))
+
+        return np.packbits(hits >= k)
+
+    def query(self, **kwargs) -> np.ndarray:
+        """
+        Bitmap of lineups matching every condition given
+        Optional:
+            - include: players that have to be in lineup
+            - exclude: players that can't be in lineup
+            - at_least: (players, k) or list of them, at least k of players in lineup
+            - stacks: {team: k} at least k players from team
+            - game_stacks: {game: k} at least k players from game
+            - bits: bitmap from an earlier query to narrow down
+        Example:
+            - query(include=['Jayson Tatum', 'Jaylen Brown'], exclude=['Al Horford'], stacks={'PHX': 2})
+        """
+        bits = kwargs.get('bits', self.all()).copy()
+
+        bits &= self.include(*kwargs.get('include', list()))
+        bits &= self.exclude(*kwargs.get('exclude', list()))
+
+        at_least = kwargs.get('at_least', list())
+        for names, k in ([at_least] if isinstance(at_least, tuple) else at_least):
+            bits &= self.at_least(names, k)
+
+        for value, stacks in (('team', kwargs.get('stacks', dict())), ('game', kwargs.get('game_stacks', dict()))):
+            for key, k in stacks.items():
+                bits &= self.stack(key, k, value)
+
+        return bits
+
+    def top(self, bits: np.ndarray, n: int = 10, by: str = 'fpts'):
+        """
+        Returns LineupPool of best n lineups in bitmap, ranked by one of the pool totals
+        """
+        positions = self.lineups(bits)
+        order = np.argsort(-self.pool.sums[by][positions], kind='stable')[:n]
+
+        return self.pool.take(positions[order])
+
+    def filter(self, **kwargs):
+        """
+        Returns LineupPool of every lineup matching query(**kwargs), in pool order
+        """
+        return self.pool.take(self.lineups(self.query(**kwargs)))
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+
+import itertools
+
+from collections.abc import Callable, Sequence
+
+from .pool import LineupPool
+
+
+class LineupMILP:
+
+    def __init__(self, players: pd.DataFrame, slots: Sequence[str], eligible: dict[str, tuple[str,...]], **kwargs) -> None:
+        """
+        Best lineups from a mixed-integer program instead of enumerating every lineup, scales to a full contest file
+        Uses scipy.optimize.milp (HiGHS, runs locally), scipy is in requirements.txt but only imported when a solve runs
+        One binary variable per player, so the same players in different slots is the same solution:
+            - number of players equals number of slots
+            - slots can be filled (Hall's condition): for every group of slots, at least as many players that can fill one of them
+              (Example: DraftKings PG/SG/G -> at least 3 players with PG or SG)
+            - salary between salary floor and cap
+            - at most team_max players from a team, at most max_teams teams
+            - user constraints (include, exclude, at_least, stacks, game_stacks), same names as PoolIndex.query, and counts from lineups.Constraints
+        Players are put in slots after (bipartite matching)
+        After each lineup is found a no-good cut (those players can't all be picked again) is added and it is solved again,
+        with fpts bounded by last lineup found
+        Parameters:
+            - players: player table indexed by name, needs pos, salary, team and fpts columns
+            - slots: slot labels in lineup order
+            - eligible: {slot: positions that can fill it} (Example: {'G': ('PG', 'SG'), ...})
+        Optional:
+            - salary: (floor, cap) (default: (0, 50_000))
+            - team_max: max players from a team (default: None, no limit)
+            - max_teams: max different teams in a lineup, adds one binary variable per team (default: None, no limit)
+            - restrict: {slot: boolean array over players} of who can fill slot on top of eligible (Example: {'C': salary >= 4_800})
+            - rule: function taking tuple of names and returning bool, lineups it rejects are cut without being kept (Example: checker.check)
+            - sum_cols: columns of players to total for every lineup, fpts and salary always included
+        """
+        self.players = players
+        self.slots = list(slots)
+        self.salary_floor, self.salary_cap = kwargs.get('salary', (0, 50_000))
+        self.team_max = kwargs.get('team_max')
+        self.max_teams = kwargs.get('max_teams')
+        self.rule: Callable[[tuple[str,...]], bool] = kwargs.get('rule', lambda names: True)
+        self.sum_cols = kwargs.get('sum_cols', list())
+
+        # fits[p, j] -> player p can fill slot j
+        self.fits = np.column_stack([
+            players['pos'].map(lambda pos_: any([pos in pos_ for pos in eligible[slot]])).to_numpy(dtype=bool)
+            for slot in self.slots
+        ])
+
+        for slot, allowed in kwargs.get('restrict', dict()).items():
+            self.fits[:, self.slots.index(slot)] &= np.asarray(allowed, dtype=bool)
+
+        # Team variables come after player variables, only when number of teams is limited
+        self.teams = self.players['team'].unique() if self.max_teams is not None else list()
+        self.n_vars = len(self.players) + len(self.teams)
+
+        return None
+
+    def player_rows(self, names: Sequence[str]) -> np.ndarray:
+        """
+        Returns row of constraint matrix with 1 for every player in names
+        """
+        ids = self.players.index.get_indexer(list(names))
+
+        if (ids < 0).any():
+            raise KeyError(f'Players missing from player table: {[name for name, id_ in zip(names, ids) if id_ < 0]}')
+
+        row = np.zeros(self.n_vars)
+        row[ids] = 1.0
+
+        return row
+
+    def value_rows(self, value: str, key: str) -> np.ndarray:
+        row = np.zeros(self.n_vars)
+        row[:len(self.players)] = self.players[value].to_numpy() == key
+
+        return row
+
+    def team_rows(self) -> tuple[list[np.ndarray], list[float], list[float]]:
+        """
+        Rows limiting number of teams: player can only be picked if their team is, and at most max_teams teams picked
+        """
+        rows = list()
+
+        for i, team in enumerate(self.teams):
+            row = self.value_rows('team', team)
+            row[len(self.players) + i] = -len(self.slots)
+            rows.append(row)
+
+        row = np.zeros(self.n_vars)
+        row[len(self.players):] = 1.0
+
+        return rows + [row], [-np.inf] * len(rows) + [0], [0] * len(rows) + [self.max_teams]
+
+    def constraints(self, **kwargs) -> tuple[list[np.ndarray], list[float], list[float]]:
+        """
+        Rows of constraint matrix with lower and upper bound of each, see __init__ for what is included
+        """
+        rows, lower, upper = list(), list(), list()
+
+        def add(row: np.ndarray, lb: float, ub: float) -> None:
+            rows.append(row)
+            lower.append(lb)
+            upper.append(ub)
+
+        add(self.player_rows(self.players.index), len(self.slots), len(self.slots))
+
+        # Hall's condition, slots that can be filled by exactly same players are grouped (taking some but not all of a group is never tighter)
+        groups, counts = np.unique(self.fits.T, axis=0, return_counts=True)
+        for k in range(1, len(groups) + 1):
+            for group in itertools.combinations(range(len(groups)), k):
+                add(np.r_[groups[list(group)].any(axis=0), np.zeros(len(self.teams))], counts[list(group)].sum(), np.inf)
+
+        add(np.r_[self.players['salary'].to_numpy(dtype=np.float64), np.zeros(len(self.teams))], self.salary_floor, self.salary_cap)
+
+        if self.team_max is not None:
+            for team in self.players['team'].unique():
+                add(self.value_rows('team', team), 0, self.team_max)
+
+        if self.max_teams is not None:
+            for row, lb, ub in zip(*self.team_rows()):
+                add(row, lb, ub)
+
+        for name in kwargs.get('include', list()):
+            add(self.player_rows([name]), 1, 1)
+
+        for name in kwargs.get('exclude', list()):
+            add(self.player_rows([name]), 0, 0)
+
+        at_least = kwargs.get('at_least', list())
+        for names, k in ([at_least] if isinstance(at_least, tuple) else at_least):
+            add(self.player_rows(names), k, np.inf)
+
+        for value, stacks in (('team', kwargs.get('stacks', dict())), ('game', kwargs.get('game_stacks', dict()))):
+            for key, k in stacks.items():
+                add(self.value_rows(value, key), k, np.inf)
+
+        for names, lo, hi in kwargs.get('counts', list()):
+            add(self.player_rows(names), lo, hi)
+
+        return rows, lower, upper
+
+    def assign(self, picked: np.ndarray) -> np.ndarray:
+        """
+        Takes ids of picked players, returns them in slot order (augmenting paths, tiny since there are only as many players as slots)
+        Picked players always fit thanks to Hall's condition constraints
+        """
+        slot_player = np.full(len(self.slots), -1, dtype=np.int64)
+
+        def place(player: int, seen: set[int]) -> bool:
+            for j in np.flatnonzero(self.fits[player]):
+                if j not in seen:
+                    seen.add(j)
+
+                    if slot_player[j] < 0 or place(slot_player[j], seen):
+                        slot_player[j] = player
+                        return True
+
+            return False
+
+        for player in picked:
+            place(player, set())
+
+        return slot_player
+
+    def solve(self, n: int, **kwargs) -> LineupPool:
+        """
+        Returns pool of best n different lineups (sets of players), best first
+        Stops early if there are no more lineups that fit constraints
+        Optional:
+            - include, exclude, at_least, stacks, game_stacks: see PoolIndex.query
+            - max_rejected: most lineups rule can reject before giving up (default: 10 * n)
+        """
+        try:
+            from scipy.optimize import milp, LinearConstraint, Bounds
+        except ImportError as error:
+            raise ImportError('LineupMILP needs scipy (pip install scipy)') from error
+
+        rows, lower, upper = self.constraints(**kwargs)
+
+        fpts = np.r_[self.players['fpts'].to_numpy(dtype=np.float64), np.zeros(len(self.teams))]
+        names = self.players.index.to_numpy()
+
+        # Next lineup is never better than last one, bounding objective keeps solver from searching above it
+        rows.append(fpts)
+        lower.append(-np.inf)
+        upper.append(np.inf)
+        objective = len(rows) - 1
+
+        lineups = list()
+        rejected = 0
+
+        while len(lineups) < n and rejected <= kwargs.get('max_rejected', 10 * n):
+            result = milp(
+                -fpts,
+                constraints=LinearConstraint(np.vstack(rows), lower, upper),
+                integrality=np.ones(len(fpts)),
+                bounds=Bounds(0, 1),
+                # Exact optimum every time, objective bound above would cut off anything better than a near-optimal answer
+                options={'mip_rel_gap': 0},
+            )
+
+            if result.x is None:
+                break
+
+            picked = np.flatnonzero(result.x[:len(self.players)] > 0.5)
+            upper[objective] = -result.fun + 1e-6
+            lineup = self.assign(picked)
+
+            if self.rule(tuple(names[lineup])):
+                lineups.append(lineup)
+            else:
+                rejected += 1
+
+            # No-good cut: same players can't all be picked again
+            rows.append(self.player_rows(names[picked]))
+            lower.append(0)
+            upper.append(len(self.slots) - 1)
+
+        ids = np.array(lineups, dtype=np.int64).reshape(-1, len(self.slots))
+
+        return LineupPool(ids, self.players, self.slots, sum_cols=self.sum_cols).sort('fpts')
@@ -0,0 +1,333 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+from .analytics import LineupAnalytics
+from .index import PoolIndex
+
+
+class LineupPool:
+
+    def __init__(self, ids: np.ndarray, players: pd.DataFrame, slots: Sequence[str], **kwargs) -> None:
+        """
+        Compact storage for a pool of lineups
+        Parameters:
+            - ids: matrix of shape (n_lineups, n_slots), ids[i, j] is position of player in players table for slot j of lineup i
+            - players: player table indexed by name, needs at least salary and fpts columns
+            - slots: label for each column of ids (Example: ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F', 'UTIL'])
+        Optional:
+            - sums: dictionary of {column: array} of already computed per-lineup totals
+            - sum_cols: columns of players to total for every lineup, fpts and salary always included
+        """
+        self.players = players
+        self.slots = list(slots)
+
+        # Smallest unsigned int that can hold every player id, uint8 for any normal sized pool
+        self.dtype = np.uint8 if len(players) <= np.iinfo(np.uint8).max + 1 else np.uint16
+        self.ids = ids if ids.dtype == self.dtype else ids.astype(self.dtype)
+
+        sum_cols = sum([
+            ['fpts', 'salary'],
+            [col for col in kwargs.get('sum_cols', list()) if col not in ('fpts', 'salary')]
+        ], list())
+
+        self.sums = kwargs.get('sums', dict())
+        for col in sum_cols:
+            if col not in self.sums:
+                self.sums[col] = self.total(col)
+
+        return None
+
+    @classmethod
+    def from_names(cls, lineups: Sequence[Sequence[str,...], ...], players: pd.DataFrame, slots: Sequence[str], **kwargs):
+        """
+        Creates pool from tuples of player names, where each tuple is ordered like slots
+        Names are converted to ids in a single vectorized lookup
+        """
+        names = np.asarray(lineups, dtype=object).reshape(-1, len(slots))
+        ids = players.index.get_indexer(names.ravel()).reshape(names.shape)
+
+        if (ids < 0).any():
+            raise KeyError(f'Players missing from player table: {sorted(set(names[ids < 0]))}')
+
+        return cls(ids, players, slots, **kwargs)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, players: pd.DataFrame, slots: Sequence[str], **kwargs):
+        """
+        Creates pool from dataframe with a column of player names for each slot (Example: output of EngineDK.create_lineups)
+        Categorical columns that already use players as categories are converted without looking up any names
+        """
+        ids = np.column_stack([
+            df[slot].cat.codes.to_numpy()
+            if isinstance(df[slot].dtype, pd.CategoricalDtype) and df[slot].cat.categories.equals(players.index)
+            else players.index.get_indexer(df[slot])
+            for slot in slots
+        ]).reshape(-1, len(slots))
+
+        if (ids < 0).any():
+            raise KeyError('Players missing from player table')
+
+        return cls(ids, players, slots, **kwargs)
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    def __repr__(self) -> str:
+        return f'LineupPool({len(self):,} lineups, {len(self.players)} players, slots={self.slots})'
+
+    @property
+    def fpts(self) -> np.ndarray:
+        return self.sums['fpts']
+
+    @property
+    def salary(self) -> np.ndarray:
+        return self.sums['salary']
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by id matrix and totals
+        """
+        return self.ids.nbytes + sum([arr.nbytes for arr in self.sums.values()])
+
+# ------------------------------- Gathers -------------------------------
+# Looking up player values for every lineup at once by indexing with id matrix
+
+    def values(self, value: str) -> np.ndarray:
+        """
+        Returns matrix of shape (n_lineups, n_slots) of value for every player in every lineup
+        Example:
+            - values('salary')[i] -> salaries of players in lineup i, in slot order
+        """
+        return self.players[value].to_numpy()[self.ids]
+
+    def total(self, value: str) -> np.ndarray:
+        """
+        Returns sum of value over players of every lineup
+        """
+        totals = self.values(value).sum(axis=1)
+
+        return totals.astype(np.int32) if value == 'salary' else totals
+
+    def names(self) -> np.ndarray:
+        """
+        Returns matrix of player names, same shape as ids
+        """
+        return self.players.index.to_numpy()[self.ids]
+
+    def codes(self, value: str) -> tuple[np.ndarray, pd.Index]:
+        """
+        For player values with few unique values (team, game, pos)
+        Returns matrix of integer codes for value of every player in every lineup, along with the values the codes refer to
+        """
+        codes, uniques = pd.factorize(self.players[value])
+        return codes.astype(np.int16)[self.ids], pd.Index(uniques)
+
+    def counts(self, value: str) -> np.ndarray:
+        """
+        Returns matrix of shape (n_lineups, n_unique_values) with number of players from each value in every lineup
+        Example:
+            - counts('team')[i, j] -> number of players on team j in lineup i
+        """
+        codes, uniques = self.codes(value)
+
+        # Single bincount over (lineup, value) pairs instead of one comparison per value
+        flat = np.arange(len(self), dtype=np.int64)[:, None] * len(uniques) + codes
+
+        return (np.bincount(flat.ravel(), minlength=len(self) * len(uniques))
+                .astype(np.uint8)
+                .reshape(len(self), len(uniques))
+               )
+
+# ------------------------------- Selection -------------------------------
+# All return new LineupPool, players table is shared
+
+    def take(self, indices: np.ndarray):
+        """
+        Returns pool of only lineups at indices (positions or boolean mask)
+        """
+        return LineupPool(
+            self.ids[indices],
+            self.players,
+            self.slots,
+            sums={col: arr[indices] for col, arr in self.sums.items()}
+        )
+
+    def sort(self, by: str = 'fpts', ascending: bool = False):
+        """
+        Returns pool sorted by one of the lineup totals, stable so ties keep generation order
+        """
+        key = self.sums[by] if ascending else -self.sums[by]
+        return self.take(np.argsort(key, kind='stable'))
+
+    def head(self, n: int):
+        return self.take(slice(0, n))
+
+    def top(self, n: int, by: str = 'fpts'):
+        """
+        Returns pool of best n lineups by one of the totals, sorted
+        Only the n picked are sorted (argpartition first), so much faster than sort().head(n) on a large unsorted pool
+        """
+        if n >= len(self):
+            return self.sort(by)
+
+        best = np.argpartition(-self.sums[by], n - 1)[:n]
+
+        return self.take(best[np.argsort(-self.sums[by][best], kind='stable')])
+
+    def rescore(self, players: pd.DataFrame, **kwargs):
+        """
+        Returns same lineups with a new player table (Example: edited projections), totals recomputed from it
+        Players are matched by name so players can be in any order, but every player in pool has to be in it
+        Optional:
+            - sum_cols: columns of players to total for every lineup, fpts and salary always included
+        """
+        players = players.reindex(self.players.index) if not players.index.equals(self.players.index) else players
+
+        if players['salary'].isna().any():
+            raise KeyError(f'Players missing from player table: {sorted(players.index[players["salary"].isna()])}')
+
+        # Salaries can't change without the lineups changing, so they don't need another gather
+        return LineupPool(self.ids, players, self.slots, sums={'salary': self.sums['salary']}, sum_cols=kwargs.get('sum_cols', list()))
+
+    def dedupe(self):
+        """
+        Drops lineups with the same set of players in a different slot order, keeps first occurrence
+        """
+        _, first = np.unique(np.sort(self.ids, axis=1), axis=0, return_index=True)
+        return self.take(np.sort(first))
+
+    def without(self, *names, **kwargs):
+        """
+        Returns pool without any lineup that has a player in names, names not in player table are ignored
+        Optional:
+            - index: PoolIndex of pool, bitmaps of names are used instead of scanning id matrix
+        """
+        names = [name for name in names if name in self.players.index]
+
+        if kwargs.get('index') is not None:
+            return self.take(kwargs['index'].mask(kwargs['index'].exclude(*names)))
+
+        # One lookup per slot into table of removed players
+        removed = np.zeros(len(self.players), dtype=bool)
+        removed[self.players.index.get_indexer(names)] = True
+
+        return self.take(~removed[self.ids].any(axis=1))
+
+    def remap(self, players: pd.DataFrame, **kwargs):
+        """
+        Returns same lineups with ids pointing into a different player table (Example: after players are added to slate)
+        Lineups with a player missing from new table are dropped, totals are recomputed from new table
+        Optional:
+            - sum_cols: columns of players to total for every lineup, fpts and salary always included
+        """
+        mapping = players.index.get_indexer(self.players.index)
+        ids = mapping[self.ids]
+
+        return LineupPool(ids[(ids >= 0).all(axis=1)], players, self.slots, sum_cols=kwargs.get('sum_cols', list()))
+
+    @classmethod
+    def concat(cls, pools: Sequence, **kwargs):
+        """
+        Stacks pools that share a player table and slots into one pool, totals recomputed
+        Optional:
+            - sum_cols: columns of players to total for every lineup, fpts and salary always included
+        """
+        players, slots = pools[0].players, pools[0].slots
+
+        if any(not pool.players.index.equals(players.index) for pool in pools):
+            raise ValueError('Pools have different player tables, remap first')
+
+        return cls(np.vstack([pool.ids.astype(np.int64) for pool in pools]).reshape(-1, len(slots)), players, slots, sum_cols=kwargs.get('sum_cols', list()))
+
+    def to_frame(self, **kwargs) -> pd.DataFrame:
+        """
+        Returns dataframe with a column for every slot followed by lineup totals
+        Slot columns are categoricals of player names with every player in pool as categories, so codes are player ids
+        Optional:
+            - summary: adds team and salary summary columns (n_teams, distro, min_salary, max_salary)
+        """
+        df = pd.DataFrame({
+            slot: pd.Categorical.from_codes(self.ids[:, j], categories=self.players.index)
+            for j, slot in enumerate(self.slots)
+        })
+
+        for col, arr in self.sums.items():
+            df[col] = arr
+
+        if kwargs.get('summary', False):
+            df = df.assign(**self.analytics().annotate('n_teams', 'distro', 'min_salary', 'max_salary'))
+
+        return df
+
+    def analytics(self) -> LineupAnalytics:
+        """
+        Returns LineupAnalytics for computing attributes of every lineup in pool
+        """
+        return LineupAnalytics(self)
+
+    def index(self) -> PoolIndex:
+        """
+        Returns PoolIndex of player and stack bitmaps for include/exclude/stack queries
+        Example:
+            - index = pool.index()
+            - index.top(index.query(include=['Jayson Tatum'], exclude=['Al Horford']), 5).to_frame()
+        """
+        return PoolIndex(self)
+
+    def annotate(self, *attrs) -> pd.DataFrame:
+        """
+        Returns to_frame() with attrs added, all computed in one batch
+        Example:
+            - pool.annotate('n_teams', 'n_games', 'distro', 'salaries', 'C-salary')
+        """
+        return self.to_frame().assign(**self.analytics().annotate(*attrs))
+
+# ------------------------------- Saving / Loading -------------------------------
+# Directory with one .npy per array so everything can be memory mapped on load
+
+    def save(self, path: str) -> str:
+        """
+        Saves pool to directory at path
+            - ids.npy: id matrix
+            - sum_{i}.npy: lineup totals (index into meta.json so columns like 'fpts/$' are safe as filenames)
+            - players.pkl: player table
+            - meta.json: slots and names of totals
+        """
+        os.makedirs(path, exist_ok=True)
+
+        np.save(os.path.join(path, 'ids.npy'), np.ascontiguousarray(self.ids))
+
+        for i, arr in enumerate(self.sums.values()):
+            np.save(os.path.join(path, f'sum_{i}.npy'), np.ascontiguousarray(arr))
+
+        self.players.to_pickle(os.path.join(path, 'players.pkl'))
+
+        with open(os.path.join(path, 'meta.json'), 'w') as file:
+            json.dump({'slots': self.slots, 'sums': list(self.sums)}, file)
+
+        return path
+
+    @classmethod
+    def load(cls, path: str, **kwargs):
+        """
+        Loads pool saved with LineupPool.save
+        Arrays are memory mapped (read-only) by default so even massive pools load instantly
+        Pass mmap=False to read everything into memory
+        """
+        mmap_mode = 'r' if kwargs.get('mmap', True) else None
+
+        with open(os.path.join(path, 'meta.json')) as file:
+            meta = json.load(file)
+
+        return cls(
+            np.load(os.path.join(path, 'ids.npy'), mmap_mode=mmap_mode),
+            pd.read_pickle(os.path.join(path, 'players.pkl')),
+            meta['slots'],
+            sums={col: np.load(os.path.join(path, f'sum_{i}.npy'), mmap_mode=mmap_mode) for i, col in enumerate(meta['sums'])}
+        )
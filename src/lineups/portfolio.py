@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class Portfolio:
+
+    def __init__(self, pool, **kwargs) -> None:
+        """
+        Selects a set of lineups to upload from a LineupPool
+        Pool is sorted by fpts so first lineup left in any bitmap is the best one
+        Optional:
+            - sort: column of pool totals to rank lineups by (default: fpts)
+        """
+        self.pool = pool.sort(kwargs.get('sort', 'fpts'))
+        self.index = self.pool.index()
+
+        # Positions in pool of lineups picked by last build() and exposure targets it missed, nothing picked until then
+        self.picks = np.empty(0, dtype=np.int64)
+        self.unmet = dict()
+
+        return None
+
+    def build(self, n: int, **kwargs):
+        """
+        Greedily picks n lineups, best remaining lineup each time, while keeping player exposures within targets
+        Parameters:
+            - n: number of lineups
+        Optional:
+            - min_exposure: {name: percent} players have to be in at least this percent of lineups
+            - max_exposure: {name: percent} players can be in at most this percent of lineups
+            - max_exposure_all: percent cap for every player not in max_exposure (default: 100)
+            - min_unique: number of players each lineup has to differ by from every other lineup picked (default: 1)
+        Constraints are applied to a bitmap of available lineups:
+            - Player reaching max exposure -> AND out their bitmap once
+            - Player short of min exposure -> next pick comes from AND of available and their bitmap
+            - After each pick -> lineups too similar to it are removed
+        Returns LineupPool of picked lineups, missed targets are in self.unmet
+        """
+        min_exposure = kwargs.get('min_exposure', dict())
+        max_exposure = kwargs.get('max_exposure', dict())
+        max_exposure_all = kwargs.get('max_exposure_all', 100.0)
+        min_unique = kwargs.get('min_unique', 1)
+
+        players = self.pool.players.index
+        n_slots = len(self.pool.slots)
+
+        # Exposure percentages -> number of lineups
+        min_counts = {self.index.player_id(name): math.ceil(n * pct / 100) for name, pct in min_exposure.items()}
+        max_counts = np.full(len(players), math.floor(n * max_exposure_all / 100))
+
+        # Minimum above default cap raises cap for that player, explicit max_exposure still wins
+        for player_id, need in min_counts.items():
+            max_counts[player_id] = max(max_counts[player_id], need)
+
+        for name, pct in max_exposure.items():
+            max_counts[self.index.player_id(name)] = math.floor(n * pct / 100)
+
+        counts = np.zeros(len(players), dtype=np.int64)
+        available = self.index.all()
+
+        # Players that can't be used at all
+        for player_id in np.flatnonzero(max_counts == 0):
+            available &= ~self.index.player_bits[player_id]
+
+        picks = list()
+        self.unmet = dict()
+
+        while len(picks) < n:
+
+            deficits = {player_id: need - counts[player_id] for player_id, need in min_counts.items() if need > counts[player_id] and player_id not in self.unmet}
+
+            pick = None
+            # Most needed player first, if no lineups left with them then target can't be hit
+            for player_id in sorted(deficits, key=lambda player_id: deficits[player_id], reverse=True):
+                pick = self.index.first(available & self.index.player_bits[player_id])
+
+                if pick is not None:
+                    break
+
+                self.unmet[players[player_id]] = deficits[player_id]
+
+            if pick is None:
+                pick = self.index.first(available)
+
+            # Nothing left that satisfies constraints
+            if pick is None:
+                break
+
+            picks.append(pick)
+            lineup = self.pool.ids[pick]
+            counts[lineup] += 1
+
+            # Players that just hit their max
+            for player_id in lineup[counts[lineup] >= max_counts[lineup]]:
+                available &= ~self.index.player_bits[player_id]
+
+            # Lineups sharing too many players with pick, always includes pick itself
+            overlap = sum([np.unpackbits(self.index.player_bits[player_id], count=self.index.n) for player_id in lineup])
+            available &= np.packbits(overlap <= n_slots - max(min_unique, 1))
+
+        for player_id, need in min_counts.items():
+            if counts[player_id] < need:
+                self.unmet[players[player_id]] = need - counts[player_id]
+
+        self.picks = np.array(picks, dtype=np.int64)
+
+        return self.pool.take(self.picks)
+
+    def exposures(self) -> pd.Series:
+        """
+        Exposure of every player in last build, in percent (empty before build)
+        """
+        return self.index.exposures(self.picks)
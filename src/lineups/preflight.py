@@ -0,0 +1,169 @@
+import time
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+from .stages import StageOrder
+
+
+class Preflight:
+
+    # Enumerating runs slower per check than sampling does (cold checker cache, garbage collection over millions of names)
+    ENUMERATE_OVERHEAD = 5
+    # Seconds for EngineDP to join one (partial roster, player) pair, k is doubled about once before top-k is certified
+    DP_SECONDS = 1e-7
+    DP_ROUNDS = 2
+    # (partial roster, player) pairs EngineDP holds at once, bytes for each
+    DP_CHUNK = 2_000_000
+    DP_PAIR_BYTES = 48
+    # Seconds for one solve of LineupMILP per player in pool, one solve per lineup
+    MILP_SECONDS = 2.5e-3
+    # Every no-good cut makes solves after it slower, solves take twice as long after this many lineups
+    MILP_CUTS = 40
+
+    def __init__(self, stages: StageOrder, players: pd.DataFrame, slots: Sequence[str], **kwargs) -> None:
+        """
+        Estimates how long and how much memory creating lineups will take before running anything, and which engine should do it
+        Engines compared:
+            - enumerate: every valid lineup (EngineDK/EngineFD generate), only one that can create full pool
+              stage sizes sampled with stages (see StageOrder.estimate), time from how long sampling took per check
+            - dp: EngineDP, exact top_n from DP over salary buckets, at most k partial rosters per salary bucket at every slot
+            - milp: LineupMILP, one solve per lineup, only when scipy is installed
+        DP and MILP only use rules on full lineups (checker.check), enumeration also drops partial lineups with checker's stricter partial rules
+        Engines' create_lineups(solver='auto') gives them enumerable as rule, so lineups are the same whichever is picked (MILP needs more cuts then, slower than estimated)
+        Times are rough (constants above were measured on a laptop), they are for telling seconds from hours
+        Parameters:
+            - stages: StageOrder for engine's pool, choose() is run if it hasn't been
+            - players: player table of engine
+            - slots: slot labels
+        Optional:
+            - top_n: number of lineups wanted (default: None, full pool)
+            - eligible: {slot: number of players that can fill it}, for DP estimate (default: every player fits every slot)
+            - salary: (floor, cap) (default: (0, 50_000))
+            - sum_cols: number of columns totaled for every lineup on top of fpts and salary (default: 0)
+            - memory: most bytes an engine can use, engines over it are never picked (default: None, no limit)
+        Example:
+            - Preflight(engine.stage_order(engine.slot_players()), engine.data, engine.labels, top_n=150).report()
+        """
+        self.stages = stages
+        self.players = players
+        self.slots = list(slots)
+        self.top_n = kwargs.get('top_n')
+        self.eligible = kwargs.get('eligible', {slot: len(players) for slot in self.slots})
+        self.floor, self.cap = kwargs.get('salary', (0, 50_000))
+        self.n_sums = 2 + kwargs.get('sum_cols', 0)
+        self.memory = kwargs.get('memory')
+
+        if stages.report.empty:
+            stages.choose()
+
+        # Sampled once for chosen order, every engine estimate uses it
+        start = time.perf_counter()
+        self.estimate = stages.estimate(stages.order)
+        elapsed = time.perf_counter() - start
+
+        # Seconds per unit of work, from how long sampling took for the work it did
+        sampled = ((self.estimate['checks'] + StageOrder.JOIN_COST) * stages.samples).sum()
+        self.seconds_per_work = elapsed / max(sampled, 1)
+        self.distinct = stages.distinct()
+
+        return None
+
+# ------------------------------- Engines -------------------------------
+
+    def enumerate(self) -> dict:
+        """
+        Estimate for creating every valid lineup
+        Memory: partial lineups of biggest stage (candidate index and player ids per unit) plus every lineup as names and in LineupPool
+        Lineups are distinct sets of players (see StageOrder.distinct)
+        """
+        widths = np.cumsum([self.stages.player_ids[unit].shape[1] for unit in self.stages.order])
+        partial_bytes = (self.estimate['kept'] * (np.arange(1, len(widths) + 1) + widths + 1) * 8).max()
+
+        # Same players from other units (DraftKings G/F/UTIL) are dropped after filling, only distinct ones are kept
+        lineups = self.estimate['kept'].iloc[-1] * self.distinct
+        n_slots = len(self.slots)
+        # Tuple of names, object array and int64 ids from LineupPool.from_names, uint8 ids and float64 sums kept
+        lineup_bytes = 56 + 8 * n_slots + 16 * n_slots + n_slots + 8 * self.n_sums
+
+        return {
+            'engine': 'enumerate',
+            'lineups': lineups,
+            'seconds': self.estimate['work'].sum() * self.seconds_per_work * self.ENUMERATE_OVERHEAD,
+            'memory': partial_bytes + lineups * lineup_bytes,
+            'available': True,
+        }
+
+    def dp(self) -> dict:
+        """
+        Estimate for EngineDP top_n
+        Partial rosters before slot j: at most k per salary bucket, never more than every way to fill slots before j
+        """
+        if self.top_n is None:
+            return {'engine': 'dp', 'lineups': np.nan, 'seconds': np.nan, 'memory': np.nan, 'available': False}
+
+        k = max(self.top_n, 8)
+        buckets = self.cap // 100 + 1
+
+        eligible = np.array([self.eligible[slot] for slot in self.slots], dtype=np.float64)
+
+        # Partial rosters before each slot, starting from the empty one
+        states = np.minimum(np.r_[1, np.cumprod(eligible)[:-1]], k * buckets)
+        pairs = states * eligible
+
+        return {
+            'engine': 'dp',
+            'lineups': min(self.top_n, self.estimate['kept'].iloc[-1] * self.distinct),
+            'seconds': pairs.sum() * self.DP_SECONDS * self.DP_ROUNDS,
+            'memory': min(pairs.max(), self.DP_CHUNK) * self.DP_PAIR_BYTES + k * buckets * len(self.slots) * 2,
+            'available': True,
+        }
+
+    def milp(self) -> dict:
+        """
+        Estimate for LineupMILP top_n, only available when scipy is installed
+        Memory: constraint matrix, every no-good cut is another row
+        """
+        available = self.top_n is not None and importlib.util.find_spec('scipy') is not None
+        n_players = len(self.players)
+
+        if not available:
+            return {'engine': 'milp', 'lineups': np.nan, 'seconds': np.nan, 'memory': np.nan, 'available': False}
+
+        return {
+            'engine': 'milp',
+            'lineups': min(self.top_n, self.estimate['kept'].iloc[-1] * self.distinct),
+            'seconds': self.top_n * n_players * self.MILP_SECONDS * (1 + self.top_n / self.MILP_CUTS),
+            'memory': (2 ** len(self.slots) + self.top_n) * n_players * 8,
+            'available': True,
+        }
+
+# ------------------------------- Report -------------------------------
+
+    def report(self) -> pd.DataFrame:
+        """
+        One row per engine: estimated lineups, seconds and memory (bytes), if engine can be used and which one route() picks
+        """
+        report = pd.DataFrame([self.enumerate(), self.dp(), self.milp()])
+
+        usable = report['available'] & (report['memory'] <= self.memory if self.memory is not None else True)
+
+        return report.assign(
+            usable=usable,
+            chosen=lambda df_: df_['engine'] == self.route(df_),
+        )
+
+    def route(self, report: pd.DataFrame|None = None) -> str:
+        """
+        Cheapest engine that is available and fits in memory, enumerate when none does (full pool needs it anyway)
+        """
+        report = report if report is not None else pd.DataFrame([self.enumerate(), self.dp(), self.milp()])
+        usable = report.loc[report['available'] & ((report['memory'] <= self.memory) if self.memory is not None else True)]
+
+        if usable.empty:
+            return 'enumerate'
+
+        return usable.sort_values('seconds', kind='stable')['engine'].iloc[0]
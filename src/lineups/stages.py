@@ -0,0 +1,312 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Callable, Sequence
+
+
+class StageOrder:
+
+    # Cost of creating a partial lineup relative to one check on it
+    JOIN_COST = 0.1
+    # Most (partial lineup, candidate) pairs joined at once
+    CHUNK = 1_000_000
+
+    def __init__(self, candidates: dict[str, Sequence[tuple[str,...]]], checks: Sequence[tuple[tuple[str,...], Callable[[tuple[str,...]], bool]]], salaries: dict[str, int], **kwargs) -> None:
+        """
+        Fills lineups one unit (slot, or group of slots like FanDuel position pairs) at a time in any order, and picks the order from the actual pool
+        Same lineups come out for every order:
+            - every check runs as soon as all of its units are filled (so a rule on PG/SG/SF still runs on them, wherever they are in the order)
+            - partial lineups whose salary can't end up in (floor, cap) with what is left are never created (salary join, searchsorted on sorted costs)
+            - lineups are returned in default order's generation order (same as a cross product in default order)
+        Parameters:
+            - candidates: {unit: tuple of candidates}, each candidate is a tuple of names, in default order
+            - checks: (units, check) pairs, check takes names of those units (in that order) and returns bool
+            - salaries: {name: salary}
+        Optional:
+            - salary: (floor, cap) every lineup has to be in (default: (0, 50_000))
+            - counts: (names, min, max) every lineup has between min and max of names, vectorized and done before checks (see lineups.Constraints)
+              candidates with more than max are dropped before filling, partial lineups as soon as they go over max or can't reach min with units left
+            - samples: partial lineups sampled per stage when estimating (default: 2_000)
+            - seed: for sampling (default: 0)
+        Example:
+            - StageOrder(slots, checks, salaries, salary=(48_500, 50_000)).choose()
+        """
+        self.units = list(candidates)
+        counts = list(kwargs.get('counts', list()))
+        self.lows = np.array([lo for _, lo, _ in counts], dtype=np.int64)
+        self.highs = np.array([hi for _, _, hi in counts], dtype=np.int64)
+
+        # hits[unit][c, i] -> players of count i in candidate c, candidates that already go over a max are never joined
+        hits = {unit: np.array([[len(set(candidate).intersection(names)) for names, _, _ in counts] for candidate in candidates[unit]], dtype=np.int64).reshape(len(candidates[unit]), len(counts)) for unit in self.units}
+        self.candidates = {unit: tuple([candidate for candidate, over in zip(candidates[unit], (hits[unit] > self.highs).any(axis=1)) if not over]) for unit in self.units}
+        self.hits = {unit: hits[unit][~(hits[unit] > self.highs).any(axis=1)] for unit in self.units}
+
+        self.checks = [(tuple(units), check) for units, check in checks]
+        self.floor, self.cap = kwargs.get('salary', (0, 50_000))
+        self.samples = kwargs.get('samples', 2_000)
+        self.seed = kwargs.get('seed', 0)
+
+        # Player ids and cost of every candidate, for duplicate and salary checks without names
+        names = sorted(set([name for unit in self.units for candidate in self.candidates[unit] for name in candidate]))
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.player_ids = {unit: np.array([[self.ids[name] for name in candidate] for candidate in self.candidates[unit]], dtype=np.int64).reshape(len(self.candidates[unit]), len(candidates[unit][0]) if len(candidates[unit]) else 1) for unit in self.units}
+        self.costs = {unit: np.array([sum([salaries[name] for name in candidate]) for candidate in self.candidates[unit]], dtype=np.int64) for unit in self.units}
+
+        # Order chosen by choose() and estimates behind it
+        self.order = list(self.units)
+        self.report = pd.DataFrame()
+        # Player ids and weights of lineups sampled by last estimate
+        self.sample = (np.empty((0, 0), dtype=np.int64), np.empty(0))
+
+        return None
+
+# ------------------------------- Stages -------------------------------
+
+    def remaining(self, order: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cheapest and most expensive salary of units after stage k (index k), for salary window of every stage
+        """
+        lows = [self.costs[unit].min() if len(self.costs[unit]) else 0 for unit in order]
+        highs = [self.costs[unit].max() if len(self.costs[unit]) else 0 for unit in order]
+
+        return np.r_[np.cumsum(lows[::-1])[::-1], 0], np.r_[np.cumsum(highs[::-1])[::-1], 0]
+
+    def reachable(self, order: Sequence[str]) -> np.ndarray:
+        """
+        Most players of every count units after stage k (row k) can still add, for dropping partial lineups that can't reach a min
+        """
+        most = np.array([self.hits[unit].max(axis=0) if len(self.hits[unit]) else np.zeros(len(self.lows), dtype=np.int64) for unit in order], dtype=np.int64).reshape(len(order), len(self.lows))
+
+        return np.r_[np.cumsum(most[::-1], axis=0)[::-1], np.zeros((1, len(self.lows)), dtype=np.int64)]
+
+    def stage_checks(self, order: Sequence[str]) -> list[list[tuple[tuple[str,...], Callable]]]:
+        """
+        Checks run at every stage of order, each runs at first stage all of its units are filled
+        """
+        done = [max([list(order).index(unit) for unit in units]) for units, _ in self.checks]
+
+        return [[check for check, k_ in zip(self.checks, done) if k_ == k] for k in range(len(order))]
+
+    def names(self, row: np.ndarray, cols: Sequence[int], units: Sequence[str]) -> tuple[str,...]:
+        """
+        Names of candidates for units, row is candidate index per filled unit and cols is column of each unit in row
+        """
+        return sum([self.candidates[unit][row[col]] for unit, col in zip(units, cols)], tuple())
+
+    def extend(self, rows: np.ndarray, ids: np.ndarray, costs: np.ndarray, order: Sequence[str], k: int, bounds: tuple[np.ndarray, np.ndarray], **kwargs) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Adds unit order[k] to partial lineups (candidate index per unit so far, player ids, salary)
+        Only candidates inside salary window are joined, then duplicates and checks done at this stage
+        Returns partial lineups kept, partial each came from and number of candidates in salary window of every partial before (how much joining it took)
+        Optional:
+            - pick: random generator, one candidate in salary window per partial instead of all of them (sampling)
+        """
+        unit = order[k]
+        lows, highs = bounds
+
+        sort = np.argsort(self.costs[unit], kind='stable')
+        sorted_costs = self.costs[unit][sort]
+
+        lo = np.searchsorted(sorted_costs, self.floor - costs - highs[k + 1], side='left')
+        hi = np.searchsorted(sorted_costs, self.cap - costs - lows[k + 1], side='right')
+        n = np.maximum(hi - lo, 0)
+
+        if kwargs.get('pick') is not None:
+            keep = n > 0
+            parents = np.flatnonzero(keep)
+            picks = sort[lo[keep] + (kwargs['pick'].random(keep.sum()) * n[keep]).astype(np.int64)]
+
+            return self.join(rows, ids, costs, order, k, parents, picks) + (n,)
+
+        # In chunks of partial lineups so joined pairs never get too big
+        joined = np.cumsum(n)
+        chunks = [self.join(rows, ids, costs, order, k, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))]
+
+        start = 0
+        while start < len(n):
+            end = max(int(np.searchsorted(joined, joined[start] - n[start] + self.CHUNK, side='right')), start + 1)
+
+            parents = np.repeat(np.arange(start, end), n[start:end])
+            offsets = np.repeat(lo[start:end] - np.r_[0, np.cumsum(n[start:end])[:-1]], n[start:end])
+            picks = sort[np.arange(len(parents)) + offsets]
+
+            chunks.append(self.join(rows, ids, costs, order, k, parents, picks))
+            start = end
+
+        return tuple([np.concatenate(parts) for parts in zip(*chunks)]) + (n,)
+
+    def join(self, rows: np.ndarray, ids: np.ndarray, costs: np.ndarray, order: Sequence[str], k: int, parents: np.ndarray, picks: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Partial lineups parents with candidates picks of unit order[k] added, only ones without duplicates that pass checks done at this stage
+        Returns them with parent of each
+        """
+        unit = order[k]
+
+        rows = np.column_stack([rows[parents], picks])
+        new_ids = self.player_ids[unit][picks]
+        keep = ~(ids[parents][:, :, None] == new_ids[:, None, :]).any(axis=(1, 2))
+        ids = np.column_stack([ids[parents], new_ids])
+        costs = costs[parents] + self.costs[unit][picks]
+
+        filled = list(order[:k + 1])
+
+        # Counts are vectorized, so partial lineups they drop never reach checks
+        if len(self.lows):
+            hits = sum([self.hits[unit_][rows[:, col]] for col, unit_ in enumerate(filled)])
+            keep &= ((hits <= self.highs) & (hits + self.reachable(order)[k + 1] >= self.lows)).all(axis=1)
+
+        for units, check in self.stage_checks(order)[k]:
+            cols = [filled.index(unit_) for unit_ in units]
+            keep &= np.array([bool(keep_) and check(self.names(row, cols, units)) for keep_, row in zip(keep, rows)], dtype=bool)
+
+        return rows[keep], ids[keep], costs[keep], parents[keep]
+
+    def fill(self, order: Sequence[str]|None = None) -> tuple[tuple[str,...], ...]:
+        """
+        Every lineup that passes every check, units filled in order (default: self.order)
+        Returned as names in default unit order, in default order's generation order
+        """
+        order = list(order or self.order)
+        bounds = self.remaining(order)
+
+        rows = np.empty((1, 0), dtype=np.int64)
+        ids = np.empty((1, 0), dtype=np.int64)
+        costs = np.zeros(1, dtype=np.int64)
+
+        for k in range(len(order)):
+            rows, ids, costs, _, _ = self.extend(rows, ids, costs, order, k, bounds)
+
+        # Back to default order, sorted like product over default order
+        rows = rows[:, [order.index(unit) for unit in self.units]]
+        rows = rows[np.lexsort(rows.T[::-1])] if len(rows) else rows
+
+        return tuple([self.names(row, range(len(self.units)), self.units) for row in rows])
+
+# ------------------------------- Estimates -------------------------------
+
+    def estimate(self, order: Sequence[str], **kwargs) -> pd.DataFrame:
+        """
+        Estimates work of filling in order by sampling, one row per stage:
+            - candidates: branching factor (candidates for unit)
+            - window: share of (partial, candidate) pairs inside salary window (only those are created)
+            - pass: share of those that pass duplicates and checks
+            - joined: estimated partial lineups created at stage
+            - checks: number of checks run at stage
+            - work: joined weighted by checks (creating partials is vectorized, every check is a python call per partial)
+            - kept: estimated partial lineups kept after stage
+        Sampled partials that are kept are resampled back up to samples every stage, so late stages with few survivors are still estimated
+        Each sampled partial stands for every candidate in its parent's salary window, so partials are resampled and pass is weighted by that
+        Sampled lineups of last stage and their weights are kept in self.sample (see distinct)
+        Optional:
+            - depth: only first depth stages (default: all)
+        """
+        order = list(order)
+        bounds = self.remaining(order)
+        rng = np.random.default_rng(self.seed)
+
+        rows = np.empty((1, 0), dtype=np.int64)
+        ids = np.empty((1, 0), dtype=np.int64)
+        costs = np.zeros(1, dtype=np.int64)
+        weights = np.ones(1)
+        kept = 1.0
+
+        stage_checks = self.stage_checks(order)
+
+        stages = list()
+        for k, unit in enumerate(order[:kwargs.get('depth', len(order))]):
+            n_candidates = len(self.candidates[unit])
+
+            if len(rows):
+                resample = rng.choice(len(rows), self.samples, p=weights / weights.sum())
+                rows, ids, costs = rows[resample], ids[resample], costs[resample]
+
+                rows, ids, costs, parents, n = self.extend(rows, ids, costs, order, k, bounds, pick=rng)
+                weights = n[parents].astype(np.float64)
+
+                # Share in window from how many candidates every sampled partial could join with, pass from the one it was joined with
+                window = n.mean() / max(n_candidates, 1)
+                passed = weights.sum() / max(n.sum(), 1)
+            else:
+                window, passed = 0.0, 0.0
+
+            joined = kept * n_candidates * window
+            kept = joined * passed
+
+            stages.append({
+                'unit': unit, 'candidates': n_candidates, 'window': window, 'pass': passed, 'joined': joined, 'checks': len(stage_checks[k]),
+                'work': joined * (len(stage_checks[k]) + self.JOIN_COST), 'kept': kept,
+            })
+
+        self.sample = (ids, weights)
+
+        return pd.DataFrame(stages)
+
+    def multiplicity(self, ids: np.ndarray) -> int:
+        """
+        Number of ways the same players come out of candidates, one per unit (other units they fit, same candidate listed twice)
+        """
+        players = set(ids.tolist())
+        ways = {frozenset(): 1}
+
+        for unit in self.units:
+            fits = [frozenset(candidate) for candidate in self.player_ids[unit][np.isin(self.player_ids[unit], ids).all(axis=1)].tolist()]
+
+            new = dict()
+            for used, n in ways.items():
+                for candidate in fits:
+                    if not used & candidate:
+                        new[used | candidate] = new.get(used | candidate, 0) + n
+            ways = new
+
+        return ways.get(frozenset(players), 0)
+
+    def distinct(self) -> float:
+        """
+        Share of lineups from last full estimate that are distinct sets of players, lineups are weighted by 1 / multiplicity
+        """
+        ids, weights = self.sample
+
+        if not len(ids) or not weights.sum():
+            return 1.0
+
+        multiplicity = np.array([self.multiplicity(row) for row in ids], dtype=np.float64)
+
+        return float((weights / np.maximum(multiplicity, 1)).sum() / weights.sum())
+
+    def greedy(self) -> list[str]:
+        """
+        Order built one stage at a time, next unit is the one that leaves fewest estimated partial lineups
+        """
+        order = list()
+
+        while len(order) < len(self.units):
+            left = [unit for unit in self.units if unit not in order]
+            kept = [self.estimate(order + [unit] + [unit_ for unit_ in left if unit_ != unit], depth=len(order) + 1)['kept'].iloc[-1] for unit in left]
+            order.append(left[int(np.argmin(kept))])
+
+        return order
+
+    def choose(self, **kwargs) -> list[str]:
+        """
+        Picks cheapest order (least estimated work over all stages, see estimate) and keeps it in self.order
+        Default order is kept without building greedy order when it is cheaper than estimating would be
+        Estimates of every order tried are in self.report
+        Optional:
+            - orders: orders to try (default: default order and greedy order)
+        """
+        default = self.estimate(self.units).assign(order='-'.join(self.units))
+
+        if 'orders' in kwargs:
+            orders = kwargs['orders']
+        elif default['work'].sum() < self.samples * len(self.units) ** 2:
+            orders = [self.units]
+        else:
+            orders = [self.units, self.greedy()]
+
+        estimates = [default if list(order) == self.units else self.estimate(order).assign(order='-'.join(order)) for order in orders]
+        work = [estimate['work'].sum() for estimate in estimates]
+
+        self.order = list(orders[int(np.argmin(work))])
+        self.report = pd.concat(estimates, ignore_index=True).assign(chosen=lambda df_: df_['order'] == '-'.join(self.order))
+
+        return self.order
@@ -0,0 +1,170 @@
+import os
+import queue
+import traceback
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from .pool import LineupPool
+
+
+def _work(results, engine, tasks: list[tuple[int, dict[str, str]]], available: frozenset[str], depth: int) -> None:
+    """
+    Runs in worker process (forked, so engine isn't copied until it's written to)
+    Every task result (or traceback) sent back through results queue
+    """
+    for task, fixed in tasks:
+        try:
+            results.put((task, LateSwap.search(engine, fixed, available, depth), None))
+        except Exception:
+            results.put((task, None, traceback.format_exc()))
+
+
+class LateSwap:
+
+    def __init__(self, engine, **kwargs) -> None:
+        """
+        Re-optimizes uploaded lineups after some games have started
+        Players whose games have started are locked: they stay in their slot and can't be swapped in anywhere else
+        Every other slot is re-filled with the engine's own generation (same checker rules) with locked slots fixed, so each search is small
+        Lineups with the same locked slots share one search, searches are spread over worker processes
+        Optional:
+            - locked: names of players whose games have started
+            - locked_teams: teams whose games have started, all of their players are locked
+            - workers: max number of processes (default: number of cores, 1 runs everything in this process)
+            - unique: no two lineups end up with the same players (default: True)
+        Example:
+            - LateSwap(engine, locked_teams=['BOS', 'NY']).run(uploaded_pool)
+        """
+        self.engine = engine
+        self.workers = max(1, kwargs.get('workers', os.cpu_count() or 1))
+        self.unique = kwargs.get('unique', True)
+
+        teams = set(kwargs.get('locked_teams', list()))
+        self.locked = frozenset(kwargs.get('locked', list())) | frozenset(engine.data.index[engine.data['team'].isin(teams)])
+        self.available = frozenset(engine.data.index.difference(list(self.locked)))
+
+        # {task: traceback} for searches that raised, their lineups are left as they were
+        self.failed = dict()
+
+        return None
+
+    @classmethod
+    def search(cls, engine, fixed: dict[str, str], available: frozenset[str], depth: int) -> np.ndarray:
+        """
+        Every valid lineup with fixed {slot: name} and other slots from available players
+        Returns ids (into engine.data) of best depth of them, best first, each lineup in slot order with fixed players in their slot
+        """
+        lineups = engine.reoptimize(fixed, available)
+
+        if not len(lineups):
+            return np.empty((0, len(engine.labels)), dtype=np.int64)
+
+        ids = engine.data.index.get_indexer(np.asarray(lineups, dtype=object).ravel()).reshape(len(lineups), -1)
+        fpts = engine.data['fpts'].to_numpy()[ids].sum(axis=1)
+
+        best = ids[np.argsort(-fpts, kind='stable')[:depth]]
+
+        # Generation can put a fixed player in the other slot of the same position (FanDuel PG1/PG2), move them back
+        for slot, name in fixed.items():
+            j, player_id = engine.labels.index(slot), engine.data.index.get_loc(name)
+            k = np.argmax(best == player_id, axis=1)
+            rows = np.arange(len(best))
+            best[rows, j], best[rows, k] = best[rows, k], best[rows, j]
+
+        return best
+
+    def tasks(self, names: np.ndarray) -> tuple[list[dict[str, str]], np.ndarray]:
+        """
+        Takes matrix of player names (one row per lineup, in slot order)
+        Returns distinct {slot: locked player} patterns and which pattern every lineup has
+        """
+        locked = np.isin(names, list(self.locked))
+        keys = [tuple([(slot, name) for slot, name, lock in zip(self.engine.labels, row, mask) if lock]) for row, mask in zip(names, locked)]
+
+        codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+
+        return [dict(key) for key in uniques], codes
+
+    def searches(self, patterns: list[dict[str, str]], depth: int) -> dict[int, np.ndarray]:
+        """
+        Runs search for every pattern, in worker processes if more than one worker
+        """
+        if self.workers == 1 or len(patterns) == 1:
+            return {task: self.search(self.engine, fixed, self.available, depth) for task, fixed in enumerate(patterns)}
+
+        results = multiprocessing.Queue()
+        chunks = [list(enumerate(patterns))[i::self.workers] for i in range(min(self.workers, len(patterns)))]
+
+        processes = [multiprocessing.Process(target=_work, args=(results, self.engine, chunk, self.available, depth), daemon=True) for chunk in chunks]
+        for process in processes:
+            process.start()
+
+        found = dict()
+        try:
+            while len(found) + len(self.failed) < len(patterns):
+                try:
+                    task, best, error = results.get(timeout=1.0)
+                except queue.Empty:
+                    # Worker died without sending everything back
+                    if not any(process.is_alive() for process in processes) and results.empty():
+                        break
+
+                    continue
+
+                if error is None:
+                    found[task] = best
+                else:
+                    self.failed[task] = error
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join()
+
+        return found
+
+    def run(self, pool: LineupPool) -> LineupPool:
+        """
+        Takes uploaded lineups (slots in same order as engine.labels) and returns re-optimized lineups in same order
+        Lineups are given best remaining swap in order of their current fpts, lineup is kept if no other valid lineup is found
+        Which lineups changed is in self.swapped
+        """
+        names = pool.names()
+        patterns, codes = self.tasks(names)
+
+        # Enough candidates that every lineup sharing a pattern can get its own even if other patterns take some
+        found = self.searches(patterns, depth=len(pool) if self.unique else 1)
+
+        current = self.engine.data.index.get_indexer(names.ravel()).reshape(names.shape)
+        if (current < 0).any():
+            raise KeyError(f'Players missing from engine: {sorted(set(names[current < 0]))}')
+
+        ids = current.copy()
+
+        if not self.unique:
+            for task, best in found.items():
+                if len(best):
+                    ids[codes == task] = best[0]
+        else:
+            taken = set([frozenset(row.tolist()) for row in current])
+            next_candidate = np.zeros(len(patterns), dtype=np.int64)
+
+            # Lineups sharing a pattern take its candidates in turn, skipping any lineup already used
+            for i in np.argsort(-pool.fpts, kind='stable'):
+                candidates = found.get(codes[i], ids[:0])
+
+                while next_candidate[codes[i]] < len(candidates):
+                    candidate = candidates[next_candidate[codes[i]]]
+                    next_candidate[codes[i]] += 1
+
+                    key = frozenset(candidate.tolist())
+                    if key == frozenset(current[i].tolist()) or key not in taken:
+                        taken.discard(frozenset(current[i].tolist()))
+                        taken.add(key)
+                        ids[i] = candidate
+                        break
+
+        self.swapped = (np.sort(ids, axis=1) != np.sort(current, axis=1)).any(axis=1)
+
+        return LineupPool(ids, self.engine.data, self.engine.labels, sum_cols=self.engine.sum_cols)
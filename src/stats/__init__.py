@@ -0,0 +1,3 @@
+from .stats import QUANTILE_LABELS, describe, grouped_quantiles
+
+version='1.0.0'
\ No newline at end of file
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from collections.abc import Sequence
+
+
+# Names used for percentiles in outputs, any other percentile n is labeled f'{n}%'
+QUANTILE_LABELS = {25: 'floor', 50: 'median', 75: 'ceiling'}
+
+# Aggregations pandas already runs in compiled code, passed straight to groupby().agg
+BUILTIN_AGGS = ('count', 'min', 'max', 'sum', 'mean', 'std', 'size')
+
+
+def percentile_label(n: int|float) -> str:
+    return QUANTILE_LABELS.get(n, f'{n}%')
+
+
+def label_percentile(label: str|int|float) -> int|float|None:
+    """
+    Takes aggregation name and returns percentile it refers to, None if it isn't a percentile
+    Example:
+        - 'ceiling' -> 75, '90%' -> 90, 90 -> 90, 'max' -> None
+    """
+    if isinstance(label, (int, float)):
+        return label
+
+    percentiles = {name: n for n, name in QUANTILE_LABELS.items()}
+    if label in percentiles:
+        return percentiles[label]
+
+    if label.endswith('%'):
+        return float(label[:-1]) if '.' in label else int(label[:-1])
+
+    return None
+
+
+def grouped_quantiles(values: np.ndarray, groups: np.ndarray, n_groups: int, qs: Sequence[float]) -> np.ndarray:
+    """
+    Quantiles of every column of values within every group in one sorted pass (no python per group)
+    Parameters:
+        - values: array of shape (n_rows, n_columns)
+        - groups: group code (0 to n_groups-1) of every row
+        - qs: quantiles between 0 and 1
+    Linear interpolation between closest ranks, same as np.percentile and DataFrame.quantile
+    NaN values are skipped, groups without any values get NaN
+    Returns array of shape (n_groups, n_columns, len(qs))
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values.reshape(len(groups), -1) if values.ndim == 1 else values
+    qs = np.asarray(qs, dtype=np.float64)
+
+    # First row of every group once sorted by group
+    starts = np.concatenate([[0], np.cumsum(np.bincount(groups, minlength=n_groups))[:-1]])
+
+    result = np.full((n_groups, values.shape[1], len(qs)), np.nan)
+
+    for j in range(values.shape[1]):
+        column = values[:, j]
+
+        # Sorted by group, then value, NaNs end up last within each group
+        order = np.lexsort((column, groups))
+        ordered = column[order]
+
+        counts = np.bincount(groups, weights=~np.isnan(column), minlength=n_groups).astype(np.int64)
+        has_values = counts > 0
+
+        # Fractional rank of each quantile within each group
+        ranks = (counts[has_values, None] - 1) * qs[None, :]
+        lower = np.floor(ranks).astype(np.int64)
+        upper = np.ceil(ranks).astype(np.int64)
+        offsets = starts[has_values, None]
+
+        low_values, high_values = ordered[offsets + lower], ordered[offsets + upper]
+        result[has_values, j, :] = low_values + (high_values - low_values) * (ranks - lower)
+
+    return result
+
+
+def describe(df: pd.DataFrame, by: str|Sequence[str], stats: Sequence[str], aggs: Sequence[str|int|float] = ('count', 'floor', 'median', 'ceiling'), **kwargs) -> pd.DataFrame:
+    """
+    Replacement for df.groupby(by)[stats].agg([..., percentile(25), 'median', percentile(75), ...])
+    Percentiles for every stat and every group come from grouped_quantiles instead of a python function called per group
+    Parameters:
+        - by: column(s) to group by
+        - stats: columns to aggregate
+        - aggs: any of 'count', 'min', 'max', 'sum', 'mean', 'std', 'size', 'range',
+                percentile labels ('floor', 'median', 'ceiling', '90%') or percentiles as numbers (25, 90)
+    Returns same layout as .agg: groups as index (sorted), columns (stat, agg) with percentiles named like percentile(n)
+    NaN handled like .agg did: 'median' and built-ins skip NaN (pandas), other percentiles are NaN for a group with any NaN in stat (np.percentile)
+    Optional:
+        - skipna: every percentile skips NaN, like DataFrame.quantile (default: False)
+    Example:
+        - describe(szn, 'name', ['fpts', 'mp'], ['count', 'min', 'floor', 'median', 'ceiling', 'max'])
+        - szn.pipe(describe, 'opp', ['fpts', 'pace'], ['count', 25, 'median', 75, 'sum'])
+    """
+    stats = list(stats)
+    grouped = df.groupby(by, sort=True)
+
+    # Groups in same order as every other groupby output, rows with missing keys (NaN from ngroup, -1 here) dropped like groupby does
+    codes = grouped.ngroup().fillna(-1).astype(np.int64).to_numpy()
+    keep = codes >= 0
+    index = grouped.size().index
+
+    percentiles = {agg: label_percentile(agg) for agg in aggs if agg not in BUILTIN_AGGS and agg != 'range'}
+    unknown = [agg for agg, n in percentiles.items() if n is None]
+    if unknown:
+        raise ValueError(f'Unknown aggregations: {unknown}')
+
+    columns = dict()
+
+    builtins = [agg for agg in aggs if agg in BUILTIN_AGGS]
+    if builtins or 'range' in aggs:
+        computed = grouped[stats].agg(sorted(set(builtins) | ({'min', 'max'} if 'range' in aggs else set())))
+        for stat in stats:
+            for agg in builtins:
+                columns[(stat, agg)] = computed[(stat, agg)].to_numpy()
+            if 'range' in aggs:
+                columns[(stat, 'range')] = (computed[(stat, 'max')] - computed[(stat, 'min')]).to_numpy()
+
+    if percentiles:
+        values = df.loc[keep, stats].to_numpy(dtype=np.float64)
+        quantiles = grouped_quantiles(values, codes[keep], len(index), [n / 100 for n in percentiles.values()])
+
+        # Groups with a NaN in each stat, percentile(n) closures called np.percentile on them and got NaN
+        missing = np.zeros((len(index), len(stats)), dtype=bool)
+        if not kwargs.get('skipna', False):
+            np.logical_or.at(missing, codes[keep], np.isnan(values))
+
+        for j, stat in enumerate(stats):
+            for k, agg in enumerate(percentiles):
+                columns[(stat, agg)] = quantiles[:, j, k] if agg == 'median' else np.where(missing[:, j], np.nan, quantiles[:, j, k])
+
+    # Stat major, aggs in order given, numbers renamed to percentile labels
+    return pd.DataFrame(
+        {(stat, percentile_label(agg) if isinstance(agg, (int, float)) else agg): columns[(stat, agg)] for stat in stats for agg in aggs},
+        index=index
+    )